@@ -0,0 +1,192 @@
+"""
+Local stand-in for the ARM and Resource Graph endpoints, serving the synthetic
+payloads of fixtures.py.
+
+It answers resource GETs (with etags and 304s), provider registrations for
+api-version discovery, paged resource group listings and paged Resource Graph
+queries. Latency and 429s can be injected. The load benchmark runs it in
+process; it can also run on its own to point a server process at it:
+
+    python benchmarks/fakearm.py --port 8080 --latency-ms 20 --throttle-rate 0.01
+    AZURE_MCP_ARM_ENDPOINT=http://127.0.0.1:8080 mcp run src/azuremcp/__init__.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+import fixtures
+
+# Constants
+LIST_PAGE_SIZE = 100
+GRAPH_PAGE_SIZE = 1000
+API_VERSIONS = ["2024-05-01", "2025-01-01", "2024-03-01"]
+REMAINING_READS = "11999"
+
+LIST_PATTERN = re.compile(r"^/subscriptions/[^/]+/resourcegroups/([^/]+)/resources$")
+PROVIDER_PATTERN = re.compile(r"^/subscriptions/[^/]+/providers/([^/]+)$")
+RESOURCE_TYPE_FILTER = re.compile(r"resourceType eq '([^']+)'", re.IGNORECASE)
+
+
+def resource_group(name: str) -> dict:
+    return {
+        "id": f"/subscriptions/{fixtures.SUBSCRIPTION_ID}/resourceGroups/{name}",
+        "name": name,
+        "type": "Microsoft.Resources/resourceGroups",
+        "location": fixtures.LOCATION,
+        "properties": {"provisioningState": "Succeeded"},
+    }
+
+
+class FakeArm:
+    """
+    aiohttp application serving fixtures like ARM does.
+    Every request waits latency plus up to jitter seconds, and is answered with a
+    429 and Retry-After with probability throttleRate.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, throttleRate: float = 0.0, retryAfter: int = 1, listSize: int = 2000, graphRows: int = 5000, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttleRate = throttleRate
+        self.retryAfter = retryAfter
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.listing = fixtures.resource_list(listSize)
+        self.graphRows = fixtures.resource_list(graphRows)
+        profiles = [
+            fixtures.managed_cluster(),
+            fixtures.network_security_group(),
+            fixtures.route_table(),
+            fixtures.virtual_network(),
+            fixtures.nat_gateway(),
+            fixtures.load_balancer(),
+            resource_group(fixtures.RESOURCE_GROUP),
+            resource_group(fixtures.NODE_RESOURCE_GROUP),
+        ] + self.listing
+        self.resources = {profile["id"].lower(): profile for profile in profiles}
+        self.providers = {}
+        for profile in profiles:
+            namespace, _, resourceType = profile["type"].partition("/")
+            if resourceType:
+                self.providers.setdefault(namespace.lower(), {"namespace": namespace, "types": set()})["types"].add(resourceType)
+        self._runner: web.AppRunner | None = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/providers/Microsoft.ResourceGraph/resources", self.graph)
+        app.router.add_get("/{path:.*}", self.get)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on host and port, 0 picks a free port. Returns the base url."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> dict:
+        return {"requests": dict(self.requests), "statuses": {str(status): count for status, count in sorted(self.statuses.items())}, "total": sum(self.requests.values())}
+
+    async def _delay(self, kind: str) -> web.Response | None:
+        self.requests[kind] += 1
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if self.throttleRate and self.random.random() < self.throttleRate:
+            return self._respond(429, {"error": {"code": "TooManyRequests", "message": "Injected throttling."}}, {"Retry-After": str(self.retryAfter)})
+        return None
+
+    def _respond(self, status: int, body: dict | None, headers: dict | None = None) -> web.Response:
+        self.statuses[status] += 1
+        headers = {"x-ms-ratelimit-remaining-subscription-reads": REMAINING_READS, **(headers or {})}
+        if body is None:
+            return web.Response(status=status, headers=headers)
+        return web.Response(status=status, text=json.dumps(body), content_type="application/json", headers=headers)
+
+    async def get(self, request: web.Request) -> web.Response:
+        path = request.path.rstrip("/").lower()
+        if match := LIST_PATTERN.match(path):
+            return await self.list(request, match.group(1))
+        if match := PROVIDER_PATTERN.match(path):
+            return await self.provider(match.group(1))
+        throttled = await self._delay("resource")
+        if throttled is not None:
+            return throttled
+        profile = self.resources.get(path)
+        if profile is None:
+            return self._respond(404, {"error": {"code": "ResourceNotFound", "message": f"Resource {request.path} was not found."}})
+        etag = profile.get("etag") or profile.get("eTag")
+        if etag is not None and request.headers.get("If-None-Match") == etag:
+            return self._respond(304, None, {"ETag": etag})
+        return self._respond(200, profile, {"ETag": etag} if etag else None)
+
+    async def provider(self, namespace: str) -> web.Response:
+        throttled = await self._delay("provider")
+        if throttled is not None:
+            return throttled
+        provider = self.providers.get(namespace)
+        if provider is None:
+            return self._respond(404, {"error": {"code": "InvalidResourceNamespace", "message": f"Namespace {namespace} was not found."}})
+        return self._respond(200, {
+            "id": f"/subscriptions/{fixtures.SUBSCRIPTION_ID}/providers/{provider['namespace']}",
+            "namespace": provider["namespace"],
+            "registrationState": "Registered",
+            "resourceTypes": [{"resourceType": resourceType, "locations": [fixtures.LOCATION], "apiVersions": API_VERSIONS} for resourceType in sorted(provider["types"])],
+        })
+
+    async def list(self, request: web.Request, resourceGroup: str) -> web.Response:
+        throttled = await self._delay("list")
+        if throttled is not None:
+            return throttled
+        items = [item for item in self.listing if f"/resourcegroups/{resourceGroup}/" in item["id"].lower()]
+        if match := RESOURCE_TYPE_FILTER.search(request.query.get("$filter", "")):
+            items = [item for item in items if item["type"].lower() == match.group(1).lower()]
+        start = int(request.query.get("$skiptoken", 0))
+        top = int(request.query.get("$top", LIST_PAGE_SIZE))
+        body = {"value": items[start:start + top]}
+        if start + top < len(items):
+            query = {key: value for key, value in request.query.items() if key != "$skiptoken"}
+            body["nextLink"] = f"{request.scheme}://{request.host}{request.path}?{urlencode({**query, '$skiptoken': start + top})}"
+        return self._respond(200, body)
+
+    async def graph(self, request: web.Request) -> web.Response:
+        throttled = await self._delay("graph")
+        if throttled is not None:
+            return throttled
+        options = (await request.json()).get("options") or {}
+        start = int(options.get("$skipToken") or options.get("$skip") or 0)
+        top = min(int(options.get("$top") or GRAPH_PAGE_SIZE), GRAPH_PAGE_SIZE)
+        page = self.graphRows[start:start + top]
+        body = {"totalRecords": len(self.graphRows), "count": len(page), "resultTruncated": "false", "data": page, "facets": []}
+        if start + top < len(self.graphRows):
+            body["$skipToken"] = str(start + top)
+        return self._respond(200, body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency of up to this much.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of injected 429s.")
+    args = parser.parse_args()
+    fake = FakeArm(args.latency_ms / 1000, args.jitter_ms / 1000, args.throttle_rate, args.retry_after)
+    web.run_app(fake.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
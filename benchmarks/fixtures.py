@@ -0,0 +1,263 @@
+"""
+Synthetic azure rest api payloads shaped like large production resources.
+"""
+import zlib
+
+SUBSCRIPTION_ID = "00000000-0000-0000-0000-000000000000"
+RESOURCE_GROUP = "bench-rg"
+NODE_RESOURCE_GROUP = "MC_bench-rg_bench-aks_eastus"
+LOCATION = "eastus"
+
+
+def arm_id(resourceGroup: str, namespace: str, type: str, name: str) -> str:
+    return f"/subscriptions/{SUBSCRIPTION_ID}/resourceGroups/{resourceGroup}/providers/{namespace}/{type}/{name}"
+
+
+VNET_ID = arm_id(RESOURCE_GROUP, "Microsoft.Network", "virtualNetworks", "bench-vnet")
+NSG_ID = arm_id(RESOURCE_GROUP, "Microsoft.Network", "networkSecurityGroups", "bench-nsg")
+ROUTE_TABLE_ID = arm_id(RESOURCE_GROUP, "Microsoft.Network", "routeTables", "bench-rt")
+NAT_GATEWAY_ID = arm_id(RESOURCE_GROUP, "Microsoft.Network", "natGateways", "bench-nat")
+CLUSTER_ID = arm_id(RESOURCE_GROUP, "Microsoft.ContainerService", "managedClusters", "bench-aks")
+LOAD_BALANCER_ID = arm_id(NODE_RESOURCE_GROUP, "Microsoft.Network", "loadBalancers", "kubernetes")
+
+
+def _etag(name: str) -> str:
+    return f'W/"{zlib.crc32(name.encode()):08x}-0000-0000-0000-000000000000"'
+
+
+def security_rule(nsgId: str, index: int) -> dict:
+    name = f"rule-{index:04d}"
+    return {
+        "name": name,
+        "id": f"{nsgId}/securityRules/{name}",
+        "etag": _etag(name),
+        "type": "Microsoft.Network/networkSecurityGroups/securityRules",
+        "properties": {
+            "provisioningState": "Succeeded",
+            "description": f"Synthetic rule {index}",
+            "protocol": ("Tcp", "Udp", "*")[index % 3],
+            "sourcePortRange": "*",
+            "destinationPortRange": str(1024 + index) if index % 4 else f"{2000 + index}-{2100 + index}",
+            "sourceAddressPrefix": f"10.{index // 256}.{index % 256}.0/24" if index % 5 else "VirtualNetwork",
+            "destinationAddressPrefix": "*",
+            "sourceAddressPrefixes": [],
+            "destinationAddressPrefixes": [],
+            "access": "Allow" if index % 7 else "Deny",
+            "priority": 100 + index,
+            "direction": "Inbound" if index % 2 else "Outbound",
+        },
+    }
+
+
+def network_security_group(rules: int = 500, nsgId: str = NSG_ID) -> dict:
+    return {
+        "name": nsgId.rsplit("/", 1)[1],
+        "id": nsgId,
+        "etag": _etag(nsgId),
+        "type": "Microsoft.Network/networkSecurityGroups",
+        "location": LOCATION,
+        "properties": {
+            "provisioningState": "Succeeded",
+            "resourceGuid": "11111111-1111-1111-1111-111111111111",
+            "securityRules": [security_rule(nsgId, i) for i in range(rules)],
+            "defaultSecurityRules": [],
+            "subnets": [{"id": f"{VNET_ID}/subnets/subnet-{i}"} for i in range(4)],
+        },
+    }
+
+
+def route_table(routes: int = 400, routeTableId: str = ROUTE_TABLE_ID) -> dict:
+    return {
+        "name": routeTableId.rsplit("/", 1)[1],
+        "id": routeTableId,
+        "etag": _etag(routeTableId),
+        "type": "Microsoft.Network/routeTables",
+        "location": LOCATION,
+        "properties": {
+            "provisioningState": "Succeeded",
+            "disableBgpRoutePropagation": False,
+            "routes": [
+                {
+                    "name": f"route-{i}",
+                    "id": f"{routeTableId}/routes/route-{i}",
+                    "etag": _etag(f"route-{i}"),
+                    "properties": {
+                        "provisioningState": "Succeeded",
+                        "addressPrefix": f"172.{16 + i // 256}.{i % 256}.0/24",
+                        "nextHopType": "VirtualAppliance",
+                        "nextHopIpAddress": "10.0.255.4",
+                    },
+                }
+                for i in range(routes)
+            ],
+            "subnets": [{"id": f"{VNET_ID}/subnets/subnet-{i}"} for i in range(4)],
+        },
+    }
+
+
+def virtual_network(subnets: int = 4) -> dict:
+    return {
+        "name": "bench-vnet",
+        "id": VNET_ID,
+        "etag": _etag(VNET_ID),
+        "type": "Microsoft.Network/virtualNetworks",
+        "location": LOCATION,
+        "properties": {
+            "provisioningState": "Succeeded",
+            "addressSpace": {"addressPrefixes": ["10.0.0.0/8"]},
+            "subnets": [
+                {
+                    "name": f"subnet-{i}",
+                    "id": f"{VNET_ID}/subnets/subnet-{i}",
+                    "etag": _etag(f"subnet-{i}"),
+                    "properties": {
+                        "provisioningState": "Succeeded",
+                        "addressPrefix": f"10.{i}.0.0/16",
+                        "networkSecurityGroup": {"id": NSG_ID},
+                        "routeTable": {"id": ROUTE_TABLE_ID},
+                        "natGateway": {"id": NAT_GATEWAY_ID},
+                    },
+                }
+                for i in range(subnets)
+            ],
+        },
+    }
+
+
+def nat_gateway() -> dict:
+    return {
+        "name": "bench-nat",
+        "id": NAT_GATEWAY_ID,
+        "etag": _etag(NAT_GATEWAY_ID),
+        "type": "Microsoft.Network/natGateways",
+        "location": LOCATION,
+        "sku": {"name": "Standard"},
+        "properties": {
+            "provisioningState": "Succeeded",
+            "idleTimeoutInMinutes": 4,
+            "publicIpAddresses": [{"id": arm_id(RESOURCE_GROUP, "Microsoft.Network", "publicIPAddresses", "nat-ip")}],
+            "subnets": [{"id": f"{VNET_ID}/subnets/subnet-{i}"} for i in range(4)],
+        },
+    }
+
+
+def load_balancer(rules: int = 100) -> dict:
+    frontendId = f"{LOAD_BALANCER_ID}/frontendIPConfigurations/frontend"
+    poolId = f"{LOAD_BALANCER_ID}/backendAddressPools/kubernetes"
+    return {
+        "name": "kubernetes",
+        "id": LOAD_BALANCER_ID,
+        "etag": _etag(LOAD_BALANCER_ID),
+        "type": "Microsoft.Network/loadBalancers",
+        "location": LOCATION,
+        "sku": {"name": "Standard", "tier": "Regional"},
+        "properties": {
+            "provisioningState": "Succeeded",
+            "frontendIPConfigurations": [
+                {
+                    "name": "frontend",
+                    "id": frontendId,
+                    "properties": {"publicIPAddress": {"id": arm_id(NODE_RESOURCE_GROUP, "Microsoft.Network", "publicIPAddresses", "outbound-ip")}},
+                }
+            ],
+            "backendAddressPools": [{"name": "kubernetes", "id": poolId, "properties": {}}],
+            "loadBalancingRules": [
+                {
+                    "name": f"rule-{i}",
+                    "id": f"{LOAD_BALANCER_ID}/loadBalancingRules/rule-{i}",
+                    "properties": {
+                        "frontendIPConfiguration": {"id": frontendId},
+                        "backendAddressPool": {"id": poolId},
+                        "protocol": "Tcp",
+                        "frontendPort": 30000 + i,
+                        "backendPort": 30000 + i,
+                        "idleTimeoutInMinutes": 4,
+                        "enableFloatingIP": False,
+                    },
+                }
+                for i in range(rules)
+            ],
+        },
+    }
+
+
+def managed_cluster(pools: int = 50) -> dict:
+    return {
+        "name": "bench-aks",
+        "id": CLUSTER_ID,
+        "type": "Microsoft.ContainerService/ManagedClusters",
+        "location": LOCATION,
+        "eTag": _etag(CLUSTER_ID),
+        "sku": {"name": "Base", "tier": "Standard"},
+        "identity": {"type": "SystemAssigned", "principalId": "22222222-2222-2222-2222-222222222222", "tenantId": "33333333-3333-3333-3333-333333333333"},
+        "properties": {
+            "provisioningState": "Succeeded",
+            "powerState": {"code": "Running"},
+            "kubernetesVersion": "1.31.2",
+            "currentKubernetesVersion": "1.31.2",
+            "dnsPrefix": "bench-aks",
+            "fqdn": "bench-aks-00000000.hcp.eastus.azmk8s.io",
+            "agentPoolProfiles": [
+                {
+                    "name": f"pool{i}",
+                    "count": 3 + i % 5,
+                    "vmSize": "Standard_D4s_v5",
+                    "osDiskSizeGB": 128,
+                    "osDiskType": "Managed",
+                    "kubeletDiskType": "OS",
+                    "vnetSubnetID": f"{VNET_ID}/subnets/subnet-{i % 4}",
+                    "maxPods": 110,
+                    "type": "VirtualMachineScaleSets",
+                    "enableAutoScaling": True,
+                    "minCount": 1,
+                    "maxCount": 20,
+                    "provisioningState": "Succeeded",
+                    "powerState": {"code": "Running"},
+                    "orchestratorVersion": "1.31.2",
+                    "currentOrchestratorVersion": "1.31.2",
+                    "mode": "System" if i == 0 else "User",
+                    "osType": "Linux",
+                    "osSKU": "Ubuntu",
+                    "nodeImageVersion": "AKSUbuntu-2204gen2containerd-202501.12.0",
+                    "nodeLabels": {f"label-{j}": f"value-{j}" for j in range(10)},
+                    "nodeTaints": [f"taint-{j}=true:NoSchedule" for j in range(3)],
+                    "upgradeSettings": {"maxSurge": "10%"},
+                    "enableNodePublicIP": False,
+                    "availabilityZones": ["1", "2", "3"],
+                }
+                for i in range(pools)
+            ],
+            "nodeResourceGroup": NODE_RESOURCE_GROUP,
+            "enableRBAC": True,
+            "networkProfile": {
+                "networkPlugin": "azure",
+                "networkPolicy": "calico",
+                "serviceCidr": "10.255.0.0/16",
+                "dnsServiceIP": "10.255.0.10",
+                "outboundType": "loadBalancer",
+                "loadBalancerSku": "standard",
+                "loadBalancerProfile": {
+                    "managedOutboundIPs": {"count": 1},
+                    "effectiveOutboundIPs": [{"id": arm_id(NODE_RESOURCE_GROUP, "Microsoft.Network", "publicIPAddresses", "outbound-ip")}],
+                    "allocatedOutboundPorts": 0,
+                    "idleTimeoutInMinutes": 30,
+                },
+                "ipFamilies": ["IPv4"],
+            },
+            "addonProfiles": {f"addon{i}": {"enabled": bool(i % 2), "config": {"key": "value"}} for i in range(10)},
+            "maxAgentPools": 100,
+        },
+    }
+
+
+def resource_list(count: int) -> list[dict]:
+    return [
+        {
+            "id": arm_id(NODE_RESOURCE_GROUP, "Microsoft.Network", "networkInterfaces", f"nic-{i}") if i % 2 else arm_id(NODE_RESOURCE_GROUP, "Microsoft.Compute", "disks", f"disk-{i}"),
+            "name": f"nic-{i}" if i % 2 else f"disk-{i}",
+            "type": "Microsoft.Network/networkInterfaces" if i % 2 else "Microsoft.Compute/disks",
+            "location": LOCATION,
+            "tags": {"aks-managed-cluster-name": "bench-aks", "index": str(i)},
+        }
+        for i in range(count)
+    ]
@@ -0,0 +1,159 @@
+"""
+Load and latency benchmark of the MCP server against the local stand-in ARM.
+
+It starts fakearm.py in process, points every client at it through
+AZURE_MCP_ARM_ENDPOINT and drives the server with concurrent in-memory MCP
+sessions, each with its own lifespan like a stdio process. Each session calls
+a mix of getters, listings, graph queries and the dependency graph. It reports
+throughput, p50/p99 latency per tool, upstream calls by kind and status and
+the peak RSS of the process. Run it from the repository root:
+
+    python benchmarks/load.py --sessions 8 --calls 50 --latency-ms 20 --throttle-rate 0.01
+    python benchmarks/load.py --sessions 8 --calls 50 --latency-ms 20 --raw-json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import fixtures
+from fakearm import FakeArm
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "src" / "azuremcp"
+
+
+class BenchCredential:
+    """Static token so the benchmark never reaches Microsoft Entra ID."""
+
+    async def get_token(self, *scopes: str, **kwargs):
+        from azure.core.credentials import AccessToken
+
+        return AccessToken("bench-token", int(time.time()) + 3600)
+
+    async def close(self) -> None:
+        pass
+
+
+def load_server():
+    """Import the server package the way mcp run does, with the benchmark credential."""
+    sys.path.insert(0, str(SERVER_DIR))
+    import context
+
+    context.DefaultAzureCredential = BenchCredential
+    spec = importlib.util.spec_from_file_location("azuremcp", SERVER_DIR / "__init__.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.server
+
+
+def workload(bypassCache: bool) -> list[tuple[str, dict]]:
+    group = {"subscriptionId": fixtures.SUBSCRIPTION_ID, "resourceGroupName": fixtures.RESOURCE_GROUP, "bypassCache": bypassCache}
+    return [
+        ("Get-Azure-ManagedClusterProfile", {**group, "clusterName": "bench-aks"}),
+        ("Get-Azure-NetworkSecurityGroups-Profile", {**group, "networkSecurityGroupsName": "bench-nsg"}),
+        ("Get-Azure-RouteTable Profile", {**group, "routeTableName": "bench-rt"}),
+        ("Get-Azure-VirtualNetwork-Profile", {**group, "virtualNetworkName": "bench-vnet"}),
+        ("Get-Azure-NATGateway-Profile", {**group, "NATGatewayName": "bench-nat"}),
+        ("List-Azure-resource-in-resourceGroup", {"subscriptionId": fixtures.SUBSCRIPTION_ID, "resourceGroupName": fixtures.NODE_RESOURCE_GROUP, "top": 100}),
+        ("Search azure graph service", {"query": "resources | where resourceGroup =~ 'MC_bench-rg_bench-aks_eastus'", "maxRows": 5000}),
+        ("Get-Azure-ManagedCluster-DependencyGraph", {"clusterId": fixtures.CLUSTER_ID, "bypassCache": bypassCache}),
+    ]
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size from /proc, None where it is not available."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def run_session(server, index: int, calls: int, plan: list[tuple[str, dict]], latencies: dict, errors: dict) -> None:
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    async with create_connected_server_and_client_session(server._mcp_server) as client:
+        for call in range(calls):
+            tool, arguments = plan[(index + call) % len(plan)]
+            start = time.perf_counter()
+            result = await client.call_tool(tool, arguments)
+            latencies[tool].append(time.perf_counter() - start)
+            if result.isError:
+                errors[tool] += 1
+
+
+async def run(args) -> dict:
+    fake = FakeArm(args.latency_ms / 1000, args.jitter_ms / 1000, args.throttle_rate, args.retry_after)
+    os.environ["AZURE_MCP_ARM_ENDPOINT"] = await fake.start()
+    if args.raw_json:
+        os.environ["AZURE_MCP_RAW_JSON"] = "1"
+    try:
+        server = load_server()
+        plan = workload(args.bypass_cache)
+        latencies, errors = defaultdict(list), defaultdict(int)
+        start = time.perf_counter()
+        await asyncio.gather(*[run_session(server, index, args.calls, plan, latencies, errors) for index in range(args.sessions)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await fake.stop()
+
+    every = [latency for values in latencies.values() for latency in values]
+    return {
+        "sessions": args.sessions,
+        "rawJson": args.raw_json,
+        "calls": len(every),
+        "errors": sum(errors.values()),
+        "seconds": round(elapsed, 3),
+        "callsPerSecond": round(len(every) / elapsed, 1),
+        "p50Ms": round(percentile(every, 50) * 1000, 2),
+        "p99Ms": round(percentile(every, 99) * 1000, 2),
+        "tools": {
+            tool: {
+                "calls": len(values),
+                "errors": errors[tool],
+                "p50Ms": round(percentile(values, 50) * 1000, 2),
+                "p99Ms": round(percentile(values, 99) * 1000, 2),
+            }
+            for tool, values in sorted(latencies.items())
+        },
+        "upstream": fake.stats(),
+        "peakRssMb": peak_rss_mb(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8, help="Number of concurrent MCP sessions.")
+    parser.add_argument("--calls", type=int, default=50, help="Tool calls per session.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency of every upstream request.")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Random extra upstream latency of up to this much.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of upstream requests answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of injected 429s.")
+    parser.add_argument("--bypass-cache", action="store_true", help="Send bypassCache to the getters so every call reaches upstream.")
+    parser.add_argument("--raw-json", action="store_true", help="Serve the getters through the raw JSON passthrough instead of the SDK models.")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail when the overall p99 latency exceeds this budget.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.max_p99_ms is not None and report["p99Ms"] > args.max_p99_ms:
+        print(f"p99 latency {report['p99Ms']:.1f} ms exceeds the {args.max_p99_ms:.1f} ms budget", file=sys.stderr)
+        return 1
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
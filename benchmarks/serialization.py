@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of the SDK model round trip against the raw JSON passthrough.
+
+The model path is what a getter does by default: parse the response body,
+deserialize it into msrest models and serialize it back to a dict. The raw path
+(AZURE_MCP_RAW_JSON=1) only parses the body. Both end with the same JSON encode
+that FastMCP applies to the tool result. Run it from the repository root:
+
+    python benchmarks/serialization.py --iterations 50
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import fixtures
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "azuremcp"))
+
+from rawjson import dumps, loads, orjson  # noqa: E402
+
+
+def cases() -> list[tuple[str, str, dict]]:
+    from azure.mgmt.containerservice.models import ManagedCluster
+    from azure.mgmt.network.models import NetworkSecurityGroup, RouteTable, LoadBalancer
+
+    return [
+        ("managedCluster (50 pools)", ManagedCluster, fixtures.managed_cluster(50)),
+        ("networkSecurityGroup (500 rules)", NetworkSecurityGroup, fixtures.network_security_group(500)),
+        ("routeTable (400 routes)", RouteTable, fixtures.route_table(400)),
+        ("loadBalancer (100 rules)", LoadBalancer, fixtures.load_balancer(100)),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"json backend: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'payload':<36}{'bytes':>10}{'model ms':>12}{'raw ms':>10}{'speedup':>10}")
+    for name, model, payload in cases():
+        body = json.dumps(payload).encode()
+
+        def model_path():
+            return dumps(model.deserialize(loads(body)).serialize(keep_readonly=True))
+
+        def raw_path():
+            return dumps(loads(body))
+
+        modelMs = min(timeit.repeat(model_path, number=args.iterations, repeat=3)) / args.iterations * 1000
+        rawMs = min(timeit.repeat(raw_path, number=args.iterations, repeat=3)) / args.iterations * 1000
+        print(f"{name:<36}{len(body):>10}{modelMs:>12.3f}{rawMs:>10.3f}{modelMs / rawMs:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Startup time benchmark of the MCP server.
+
+Every stdio or mcpo session spawns a fresh server process, so this measures a
+cold process each run: the time to import the server module and the time until
+the first list_tools answer. Run it from the repository root:
+
+    python benchmarks/startup.py --runs 5 --max-import-ms 1500
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "src" / "azuremcp"
+
+PROBE = """
+import asyncio, importlib.util, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+spec = importlib.util.spec_from_file_location("azuremcp", {server_file!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+tools = asyncio.run(module.server.list_tools())
+listed = time.perf_counter()
+print(json.dumps({{
+    "importMs": (imported - start) * 1000,
+    "firstListToolsMs": (listed - start) * 1000,
+    "tools": len(tools),
+    "azureSdkModules": sorted({{name.split(".")[2] for name in sys.modules if name.startswith("azure.mgmt.") and name.count(".") >= 2}}),
+}}))
+"""
+
+
+def measure() -> dict:
+    probe = PROBE.format(server_dir=str(SERVER_DIR), server_file=str(SERVER_DIR / "__init__.py"))
+    output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold processes to measure.")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail when the median import time exceeds this budget.")
+    parser.add_argument("--max-list-tools-ms", type=float, default=None, help="Fail when the median time to first list_tools exceeds this budget.")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "tools": runs[-1]["tools"],
+        "azureSdkModulesAtStartup": runs[-1]["azureSdkModules"],
+        "importMs": {"median": statistics.median(r["importMs"] for r in runs), "max": max(r["importMs"] for r in runs)},
+        "firstListToolsMs": {"median": statistics.median(r["firstListToolsMs"] for r in runs), "max": max(r["firstListToolsMs"] for r in runs)},
+    }
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    if args.max_import_ms is not None and report["importMs"]["median"] > args.max_import_ms:
+        print(f"import time {report['importMs']['median']:.1f}ms exceeds budget {args.max_import_ms}ms", file=sys.stderr)
+        failed = True
+    if args.max_list_tools_ms is not None and report["firstListToolsMs"]["median"] > args.max_list_tools_ms:
+        print(f"time to first list_tools {report['firstListToolsMs']['median']:.1f}ms exceeds budget {args.max_list_tools_ms}ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
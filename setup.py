@@ -15,11 +15,15 @@ setup(
         "azure-identity>=1.21.0",
         "azure-mgmt-containerservice>=34.2.0",
         "httpx>=0.28.1",
+        "jmespath>=1.0.1",
         "azure-mgmt-network>=28.1.0",
-        "mcp[cli]>=1.6.0",
+        "mcp[cli]>=1.8.0",
         "mcpo>=0.0.10",
         "azure-mgmt-resource>=23.3.0",
         "azure-mgmt-resourcegraph>=8.0.0",
     ],
+    extras_require={
+        "fast-json": ["orjson>=3.10.0"],
+    },
     include_package_data=True,
 )
@@ -0,0 +1,56 @@
+import time
+from singleflight import SingleFlight
+
+# Constants
+API_VERSION_TTL = 24 * 3600.0
+
+
+def latest_api_version(apiVersions: list[str]) -> str | None:
+    """Newest stable api-version, or the newest preview when there is no stable one."""
+    stable = [version for version in apiVersions if "preview" not in version.lower()]
+    return max(stable or apiVersions, default=None)
+
+
+class ApiVersionCache:
+    """
+    Latest api-version of each resource type, read from the provider registration.
+    A whole provider namespace is loaded at once and refreshed after the ttl.
+    """
+
+    def __init__(self, ttl: float = API_VERSION_TTL):
+        self._ttl = ttl
+        self._versions: dict[str, str] = {}
+        self._loaded: dict[str, float] = {}
+        self._flights = SingleFlight()
+
+    async def get(self, client, resourceType: str) -> str:
+        """
+        Args:
+                client: A ResourceManagementClient used to read the provider registration.
+                resourceType (str): The resource type, e.g. Microsoft.Network/publicIPAddresses.
+        Returns:
+                str: The api-version to use for the resource type.
+        """
+        key = resourceType.lower()
+        namespace = key.split("/", 1)[0]
+        if time.monotonic() - self._loaded.get(namespace, float("-inf")) > self._ttl:
+            await self._flights.do(namespace, lambda: self._load(client, namespace))
+        version = self._versions.get(key)
+        if version is None:
+            raise ValueError(f"No api-version registered for resource type {resourceType}")
+        return version
+
+    async def _load(self, client, namespace: str) -> None:
+        provider = await client.providers.get(namespace)
+        for resourceType in provider.resource_types or []:
+            version = latest_api_version(resourceType.api_versions or [])
+            if version is not None:
+                self._versions[f"{namespace}/{resourceType.resource_type}".lower()] = version
+        self._loaded[namespace] = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"namespaces": sorted(self._loaded), "resourceTypes": len(self._versions)}
+
+
+# Shared by every session of the process.
+apiVersions = ApiVersionCache()
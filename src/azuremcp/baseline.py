@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from store import SnapshotStore
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _flatten(value, prefix: str, flat: dict) -> dict:
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}" if prefix else key, flat)
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            _flatten(item, f"{prefix}[{index}]", flat)
+    else:
+        flat[prefix] = value
+    return flat
+
+
+def diff(old: dict, new: dict) -> dict:
+    """
+    Compact diff of two profiles keyed by dotted path.
+    Returns:
+            dict: {path: {"old": value, "new": value}} for every changed leaf.
+    """
+    before, after = _flatten(old, "", {}), _flatten(new, "", {})
+    return {
+        path: {"old": before.get(path), "new": after.get(path)}
+        for path in sorted(before.keys() | after.keys())
+        if before.get(path) != after.get(path)
+    }
+
+
+@dataclass
+class BaselineEntry:
+    resourceId: str
+    profile: dict
+    fetchedAt: datetime
+
+
+class ResourceBaseline:
+    """
+    Last seen profile of every tracked resource, keyed by resource id.
+    Unlike the response cache it never expires, so changes are always diffed against what the caller saw.
+    It is kept in the state backend when one is configured, so new stdio processes and
+    every HTTP worker diff against the same baseline, and in process memory otherwise.
+    """
+
+    def __init__(self, store: SnapshotStore | None = None):
+        self._store = store
+        self._entries: dict[str, BaselineEntry] = {}
+
+    @staticmethod
+    def _key(resourceId: str) -> str:
+        return "baseline:" + resourceId.lower()
+
+    async def get(self, resourceId: str) -> BaselineEntry | None:
+        if self._store is None:
+            return self._entries.get(resourceId.lower())
+        snapshot = await self._store.get(self._key(resourceId))
+        if snapshot is None:
+            return None
+        entry = snapshot.profile
+        return BaselineEntry(resourceId=entry["resourceId"], profile=entry["profile"], fetchedAt=datetime.fromisoformat(entry["fetchedAt"]))
+
+    async def put(self, resourceId: str, profile: dict, fetchedAt: datetime) -> None:
+        if self._store is None:
+            self._entries[resourceId.lower()] = BaselineEntry(resourceId=resourceId, profile=profile, fetchedAt=fetchedAt)
+        else:
+            await self._store.put(self._key(resourceId), {"resourceId": resourceId, "profile": profile, "fetchedAt": fetchedAt.isoformat()})
+
+    async def touch(self, resourceId: str, fetchedAt: datetime) -> None:
+        """Mark an unchanged resource as verified up to fetchedAt."""
+        entry = await self.get(resourceId)
+        if entry is not None:
+            await self.put(entry.resourceId, entry.profile, fetchedAt)
+
+    async def forget(self, resourceId: str) -> None:
+        if self._store is None:
+            self._entries.pop(resourceId.lower(), None)
+        else:
+            await self._store.delete(self._key(resourceId))
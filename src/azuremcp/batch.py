@@ -0,0 +1,110 @@
+from server import server
+
+import asyncio
+from pydantic import Field
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import parse_resource_id
+from cache import BypassCache, resource_type
+from containerservice import get_azure_kubernetes_profile
+from network import (
+    get_azure_virtualnetwork_profile,
+    get_azure_routetable_profile,
+    get_azure_networksecuritygroups_profile,
+    get_azure_natGateway_profile,
+    get_azure_loadBalancer_profile,
+)
+from projection import Summary
+from resource import get_azure_resource_by_id, get_azure_resource_group
+
+# Constants
+BATCH_MAX_CONCURRENCY = 8
+BATCH_MAX_ITEMS = 100
+
+# Resource type -> (getter tool, name of the getter's resource name parameter).
+RESOURCE_GETTERS = {
+    "microsoft.containerservice/managedclusters": (get_azure_kubernetes_profile, "clusterName"),
+    "microsoft.network/virtualnetworks": (get_azure_virtualnetwork_profile, "virtualNetworkName"),
+    "microsoft.network/routetables": (get_azure_routetable_profile, "routeTableName"),
+    "microsoft.network/networksecuritygroups": (get_azure_networksecuritygroups_profile, "networkSecurityGroupsName"),
+    "microsoft.network/natgateways": (get_azure_natGateway_profile, "NATGatewayName"),
+    "microsoft.network/loadbalancers": (get_azure_loadBalancer_profile, "loadBalancerName"),
+    "microsoft.resources/resourcegroups": (get_azure_resource_group, None),
+}
+
+
+async def fetch_profile(ctx: Context, resourceId: str, bypassCache: bool = False, summary: bool = False) -> dict:
+    """
+    Route an azure resource id to the getter tool of its resource type.
+    Resource types without a dedicated tool are fetched by id.
+    Args:
+            resourceId (str): The Azure resource id.
+            bypassCache (bool): Skip the response cache.
+            summary (bool): Drop null and empty fields.
+    Returns:
+            dict: The resource profile in JSON format.
+    """
+    getter, nameParameter = RESOURCE_GETTERS.get(resource_type(resourceId), (None, None))
+    if getter is None:
+        return await get_azure_resource_by_id(
+            ctx,
+            resourceId=resourceId,
+            apiVersion=None,
+            bypassCache=bypassCache,
+            fields=None,
+            jmesPath=None,
+            summary=summary,
+        )
+    parts = parse_resource_id(resourceId)
+    kwargs = {
+        "subscriptionId": parts["subscription"],
+        "resourceGroupName": parts["resource_group"],
+        "bypassCache": bypassCache,
+        "fields": None,
+        "jmesPath": None,
+        "summary": summary,
+    }
+    if nameParameter is not None:
+        kwargs[nameParameter] = parts["name"]
+    return await getter(ctx, **kwargs)
+
+
+@server.tool(
+    name="Get-Azure-Resources-Batch",
+    description="Get the profiles of many azure resources in JSON format from azure rest api in a single call. "
+    "Put a list of azure resource ids, e.g. the aks cluster, its virtual network, route table, network security group, nat gateway and load balancer. "
+    "Any resource type is supported; managedClusters, virtualNetworks, routeTables, networkSecurityGroups, natGateways, loadBalancers and resource groups use their dedicated tools. "
+    "Resources are fetched concurrently. It returns one item per resource id with either the profile or the error of that resource, so one failure does not fail the whole call.",
+)
+async def get_azure_resources_batch(
+    ctx: Context,
+    resourceIds: list[str] = Field(description="The Azure resource ids.", max_length=BATCH_MAX_ITEMS),
+    maxConcurrency: int = Field(default=BATCH_MAX_CONCURRENCY, ge=1, le=32, description="The number of resources fetched at the same time."),
+    bypassCache: BypassCache = False,
+    summary: Summary = False,
+) -> list[dict]:
+    """
+    Azure resource profiles in batch.
+    Args:
+            resourceIds (list[str]): The Azure resource ids.
+            maxConcurrency (int): The number of resources fetched at the same time.
+            bypassCache (bool): Skip the response cache.
+            summary (bool): Drop null and empty fields.
+    Returns:
+            list[dict]: One item per resource id with the profile or the error in JSON format.
+    """
+    semaphore = asyncio.Semaphore(maxConcurrency)
+    results: list[dict] = [{} for _ in resourceIds]
+
+    async def fetch(index: int, resourceId: str) -> None:
+        async with semaphore:
+            try:
+                results[index] = {"id": resourceId, "profile": await fetch_profile(ctx, resourceId, bypassCache, summary)}
+            except Exception as e:
+                results[index] = {"id": resourceId, "error": f"{type(e).__name__}: {e}"}
+
+    done = 0
+    for completed in asyncio.as_completed([fetch(i, resourceId) for i, resourceId in enumerate(resourceIds)]):
+        await completed
+        done += 1
+        await ctx.report_progress(done, len(resourceIds))
+    return results
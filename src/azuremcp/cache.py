@@ -0,0 +1,167 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Annotated
+from pydantic import Field
+from azure.core.exceptions import ResourceNotModifiedError
+from metrics import metrics
+from offload import offload
+from singleflight import SingleFlight
+from store import SnapshotStore
+
+# Cache parameter shared by the profile getters.
+BypassCache = Annotated[bool, Field(description="Skip the response cache and fetch the profile from azure rest api.")]
+
+# Constants
+CACHE_MAX_ENTRIES = 512
+CACHE_DEFAULT_TTL = 60.0
+# Seconds a cached profile stays fresh, keyed by lower case resource type.
+CACHE_TTL_BY_TYPE = {
+    "microsoft.containerservice/managedclusters": 30.0,
+    "microsoft.network/virtualnetworks": 120.0,
+    "microsoft.network/routetables": 120.0,
+    "microsoft.network/networksecuritygroups": 60.0,
+    "microsoft.network/natgateways": 300.0,
+    "microsoft.network/loadbalancers": 60.0,
+    "microsoft.resources/resourcegroups": 300.0,
+}
+
+
+def resource_type(resourceId: str) -> str:
+    """
+    Lower case resource type of an azure resource id, e.g. microsoft.network/virtualnetworks.
+    Resource group ids map to microsoft.resources/resourcegroups.
+    """
+    parts = [part for part in resourceId.lower().split("/") if part]
+    if "providers" not in parts:
+        return "microsoft.resources/resourcegroups" if "resourcegroups" in parts else "microsoft.resources/subscriptions"
+    index = len(parts) - 1 - parts[::-1].index("providers")
+    namespace, rest = parts[index + 1], parts[index + 2:]
+    return "/".join([namespace] + rest[0::2])
+
+
+def conditional_headers(etag: str | None) -> dict:
+    """Headers asking azure rest api to answer 304 when the resource still has the given etag."""
+    return {"If-None-Match": etag} if etag else {}
+
+
+@dataclass
+class CacheEntry:
+    profile: dict
+    etag: str | None
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized resource profiles keyed by resource id.
+    Expired entries are revalidated with their etag: a 304 or an unchanged etag
+    keeps the cached profile and skips serialization. Concurrent misses of the
+    same resource share one upstream call. With a snapshot store, misses are
+    answered from disk while the snapshot is fresh.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, default_ttl: float = CACHE_DEFAULT_TTL, ttl_by_type: dict[str, float] | None = None, store: SnapshotStore | None = None):
+        self._max_entries = max_entries
+        self._store = store
+        self._default_ttl = default_ttl
+        self._ttl_by_type = CACHE_TTL_BY_TYPE if ttl_by_type is None else ttl_by_type
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    def ttl(self, resourceId: str) -> float:
+        return self._ttl_by_type.get(resource_type(resourceId), self._default_ttl)
+
+    async def get(self, resourceId: str, fetch: Callable[[str | None], Awaitable[object]], bypass: bool = False) -> dict:
+        """
+        Return the cached profile of a resource or fetch it.
+        Args:
+                resourceId (str): The Azure resource id.
+                fetch (Callable): Coroutine function taking the cached etag (or None) and returning the SDK model or the raw JSON body.
+                bypass (bool): Skip the fresh cache entry and always call azure rest api.
+        Returns:
+                dict: The resource profile in JSON format.
+        """
+        key = resourceId.lower()
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and not bypass and entry.expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.increment("cache_requests_total", help="Response cache lookups.", result="hit")
+            return entry.profile
+
+        if entry is None and self._store is not None:
+            snapshot = await self._store.get(key)
+            if snapshot is not None:
+                # Seed from disk so the etag revalidates the snapshot instead of refetching it.
+                entry = self._insert(key, CacheEntry(profile=snapshot.profile, etag=snapshot.etag, expires_at=now + self.ttl(resourceId) - snapshot.age))
+                if not bypass and self._store.fresh(snapshot):
+                    self._store.hits += 1
+                    self.hits += 1
+                    metrics.increment("cache_requests_total", help="Response cache lookups.", result="snapshot")
+                    self._store.revalidate(lambda: self._flights.do(key, lambda: self._fetch(resourceId, entry, fetch)))
+                    return snapshot.profile
+                self._store.stale += 1
+
+        self.misses += 1
+        metrics.increment("cache_requests_total", help="Response cache lookups.", result="miss")
+        return await self._flights.do(key, lambda: self._fetch(resourceId, entry, fetch))
+
+    async def _fetch(self, resourceId: str, entry: CacheEntry | None, fetch: Callable[[str | None], Awaitable[object]]) -> dict:
+        etag = entry.etag if entry is not None else None
+        try:
+            model = await fetch(etag)
+            if isinstance(model, dict):
+                newEtag = model.get("etag") or model.get("eTag")
+            else:
+                newEtag = getattr(model, "etag", None) or getattr(model, "e_tag", None)
+        except ResourceNotModifiedError:
+            model = None
+            newEtag = etag
+        if entry is not None and newEtag is not None and newEtag == entry.etag:
+            self.revalidated += 1
+            metrics.increment("cache_revalidated_total", help="Expired cache entries revalidated by etag.")
+            profile = entry.profile
+        elif isinstance(model, dict):
+            profile = model
+        else:
+            with metrics.phase("serialize"):
+                profile = await offload(model.serialize, keep_readonly=True)
+        self.put(resourceId, profile, newEtag)
+        if self._store is not None:
+            await self._store.put(resourceId.lower(), profile, newEtag)
+        return profile
+
+    def _insert(self, key: str, entry: CacheEntry) -> CacheEntry:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def put(self, resourceId: str, profile: dict, etag: str | None = None) -> None:
+        self._insert(resourceId.lower(), CacheEntry(profile=profile, etag=etag, expires_at=time.monotonic() + self.ttl(resourceId)))
+
+    def invalidate(self, resourceId: str) -> None:
+        self._entries.pop(resourceId.lower(), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "coalesced": self._flights.coalesced,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+            "snapshots": self._store.stats() if self._store is not None else None,
+        }
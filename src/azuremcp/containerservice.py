@@ -1,21 +1,20 @@
-from context import app_lifespan
+from server import server
 
 from pydantic import Field
-from mcp.server.fastmcp import Context, FastMCP
-from azure.mgmt.containerservice.aio import ContainerServiceClient
+from cache import BypassCache, conditional_headers
+from projection import Fields, JmesPath, Summary, project
+from rawjson import get_raw
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import resource_id
 
-# Initialize FastMCP server
-managedCluster = FastMCP(
-    "Azure Kubernetes Service MCP server",
-    dependencies=["azure-mgmt-containerservice", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
 
 # Constants
+CONTAINER_SERVICE_CLIENT = "azure.mgmt.containerservice.aio:ContainerServiceClient"
+CONTAINER_SERVICE_API_VERSION = "2025-01-01"
 USER_AGENT = "aks-mcp-server/1.0"
 
 
-@managedCluster.tool(
+@server.tool(
     name="Get-Azure-ManagedClusterProfile",
     description="Get Azure Kubernetes Service (AKS) managed cluster profile in JSON format from azure rest api. It contains all of aks cluster configurations."
     "SubscriptionId, resourceGroupName and clusterName are required parameters. "
@@ -30,6 +29,10 @@ async def get_azure_kubernetes_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     clusterName: str = Field(description="The Azure kubernetes cluster name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure Kubernetes Service (AKS) managed cluster profile.
@@ -37,17 +40,35 @@ async def get_azure_kubernetes_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             clusterName (str): The Azure resource name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The AKS resource profile in JSON format.
     """
-    mc = None
-    async with ContainerServiceClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        mc = await client.managed_clusters.get(
-            resource_group_name=resourceGroupName, resource_name=clusterName
-        )
-        await client.close()
-    return mc.serialize(keep_readonly=True)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.ContainerService",
+        type="managedClusters",
+        name=clusterName,
+    )
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            CONTAINER_SERVICE_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, CONTAINER_SERVICE_API_VERSION, etag)
+            return await client.managed_clusters.get(
+                resource_group_name=resourceGroupName,
+                resource_name=clusterName,
+                headers=conditional_headers(etag),
+            )
+
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
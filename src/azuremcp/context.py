@@ -1,20 +1,204 @@
-
-from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
-from azure.identity.aio import DefaultAzureCredential
-from dataclasses import dataclass
-from mcp.server.fastmcp import FastMCP 
-
-@dataclass
-class AppContext:
-    credential: DefaultAzureCredential
-
-@asynccontextmanager
-async def app_lifespan(_: FastMCP) -> AsyncIterator[AppContext]:
-    """Manage application lifecycle with type-safe context"""
-    # Initialize on startup
-    credential = DefaultAzureCredential()
-    try:
-        yield AppContext(credential=credential)
-    finally:
-        await credential.close()
+
+import asyncio
+import importlib
+import os
+import time
+import aiohttp
+from contextlib import asynccontextmanager
+from collections.abc import AsyncIterator
+from azure.core.pipeline import PipelineRequest
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from azure.core.pipeline.transport import AioHttpTransport
+from baseline import ResourceBaseline
+from cache import ResponseCache
+from credential import PrewarmedCredential
+from metrics import MetricsPolicy, metrics
+from singleflight import SingleFlight
+from store import SNAPSHOT_PATH, SnapshotStore
+from throttle import ArmThrottle, ArmThrottlingPolicy
+from azure.identity.aio import DefaultAzureCredential
+from dataclasses import dataclass, field
+from mcp.server.fastmcp import FastMCP
+
+# Constants
+CLIENT_IDLE_TIMEOUT = 300.0
+CONNECTION_LIMIT = 100
+KEEPALIVE_TIMEOUT = 60.0
+# Return raw ARM response bodies instead of round tripping them through SDK models.
+RAW_JSON = os.environ.get("AZURE_MCP_RAW_JSON", "").lower() in ("1", "true", "yes")
+# Shared state backend as "package.module:ClassName", constructed with AZURE_MCP_SNAPSHOT_PATH.
+STATE_BACKEND = os.environ.get("AZURE_MCP_STATE_BACKEND", "store:SnapshotStore")
+# Share access tokens between server processes through the state backend.
+SHARE_TOKENS = os.environ.get("AZURE_MCP_SHARE_TOKENS", "").lower() in ("1", "true", "yes")
+# Send every request to this endpoint instead of the public ARM endpoint, e.g. a local stand-in for benchmarks.
+ARM_ENDPOINT = os.environ.get("AZURE_MCP_ARM_ENDPOINT")
+
+
+def import_client(clientType: str) -> type:
+    """
+    Import an Azure SDK client class from "package.module:ClassName".
+    The management SDKs are large, so each one is imported on first use only.
+    """
+    module, _, name = clientType.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+class AllowHttpPolicy(SansIOHTTPPolicy):
+    """Let the bearer token policy send tokens to a plain http ARM_ENDPOINT."""
+
+    def on_request(self, request: PipelineRequest) -> None:
+        request.context["enforce_https"] = False
+
+
+@dataclass
+class PooledClient:
+    client: object
+    borrowed: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ClientPool:
+    """
+    Long-lived Azure management clients keyed by (client type, subscription).
+    All clients share a single keep-alive aiohttp session so tools reuse
+    TCP/TLS connections to ARM instead of building a new pipeline per call.
+    """
+
+    def __init__(self, credential: PrewarmedCredential, session: aiohttp.ClientSession, throttle: ArmThrottle, idle_timeout: float = CLIENT_IDLE_TIMEOUT):
+        self._credential = credential
+        self._session = session
+        self._throttle = throttle
+        self._idle_timeout = idle_timeout
+        self._clients: dict[tuple[str, str | None], PooledClient] = {}
+
+    @asynccontextmanager
+    async def client(self, client_type: str, subscription_id: str | None = None, **kwargs):
+        """
+        Borrow a pooled client, creating it on first use.
+        Args:
+                client_type (str): The Azure SDK aio client class as "package.module:ClassName".
+                subscription_id (str): The Azure subscription ID, None for tenant level clients.
+                kwargs: Extra client constructor arguments such as user_agent.
+        """
+        key = (client_type, subscription_id)
+        pooled = self._clients.get(key)
+        if pooled is None:
+            if subscription_id is not None:
+                kwargs["subscription_id"] = subscription_id
+            if ARM_ENDPOINT:
+                kwargs["base_url"] = ARM_ENDPOINT
+                if ARM_ENDPOINT.lower().startswith("http://"):
+                    kwargs["per_call_policies"] = [AllowHttpPolicy()]
+            with metrics.phase("client"):
+                pooled = PooledClient(
+                    client=import_client(client_type)(
+                        credential=self._credential,
+                        transport=AioHttpTransport(session=self._session, session_owner=False),
+                        per_retry_policies=[ArmThrottlingPolicy(self._throttle), MetricsPolicy()],
+                        **kwargs,
+                    )
+                )
+            self._clients[key] = pooled
+        pooled.borrowed += 1
+        try:
+            yield pooled.client
+        finally:
+            pooled.borrowed -= 1
+            pooled.last_used = time.monotonic()
+
+    async def evict_idle(self) -> None:
+        """Close clients that have not been borrowed within the idle timeout."""
+        deadline = time.monotonic() - self._idle_timeout
+        for key, pooled in list(self._clients.items()):
+            if pooled.borrowed == 0 and pooled.last_used < deadline:
+                del self._clients[key]
+                await pooled.client.close()
+
+    async def run_eviction(self) -> None:
+        while True:
+            await asyncio.sleep(self._idle_timeout / 2)
+            await self.evict_idle()
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for pooled in clients:
+            await pooled.client.close()
+
+
+@dataclass
+class AppContext:
+    credential: PrewarmedCredential
+    clients: ClientPool
+    cache: ResponseCache
+    flights: SingleFlight
+    throttle: ArmThrottle
+    store: SnapshotStore | None = None
+    baseline: ResourceBaseline = field(default_factory=ResourceBaseline)
+    rawJson: bool = RAW_JSON
+
+
+# Set while an HTTP worker serves, so every session of the process shares one warm context.
+_process_context: AppContext | None = None
+
+
+@asynccontextmanager
+async def app_context() -> AsyncIterator[AppContext]:
+    """Create the credential, clients, caches and store, and close them on exit."""
+    store = None
+    if SNAPSHOT_PATH:
+        store = import_client(STATE_BACKEND)(SNAPSHOT_PATH)
+        await store.open()
+    # Probe the credential chain and acquire the ARM token in the background,
+    # so the first tool call finds a warm token instead of paying for it inline.
+    credential = PrewarmedCredential(DefaultAzureCredential(), store=store if SHARE_TOKENS else None)
+    refresh = asyncio.create_task(credential.run_refresh())
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT, keepalive_timeout=KEEPALIVE_TIMEOUT),
+        cookie_jar=aiohttp.DummyCookieJar(),
+        auto_decompress=False,
+        trust_env=True,
+    )
+    throttle = ArmThrottle()
+    clients = ClientPool(credential=credential, session=session, throttle=throttle)
+    eviction = asyncio.create_task(clients.run_eviction())
+    try:
+        yield AppContext(
+            credential=credential,
+            clients=clients,
+            cache=ResponseCache(store=store),
+            flights=SingleFlight(),
+            throttle=throttle,
+            store=store,
+            baseline=ResourceBaseline(store=store),
+        )
+    finally:
+        eviction.cancel()
+        refresh.cancel()
+        if store is not None:
+            await store.close()
+        await clients.close()
+        await session.close()
+        await credential.close()
+
+
+@asynccontextmanager
+async def process_context() -> AsyncIterator[AppContext]:
+    """Share one context between every session of the process until exit."""
+    global _process_context
+    async with app_context() as app:
+        _process_context = app
+        try:
+            yield app
+        finally:
+            _process_context = None
+
+
+@asynccontextmanager
+async def app_lifespan(_: FastMCP) -> AsyncIterator[AppContext]:
+    """Manage application lifecycle with type-safe context"""
+    if _process_context is not None:
+        yield _process_context
+        return
+    async with app_context() as app:
+        yield app
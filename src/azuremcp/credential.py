@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import time
+from azure.core.credentials import AccessToken
+from azure.identity.aio import DefaultAzureCredential
+from metrics import metrics
+from store import SnapshotStore
+
+# Constants
+ARM_SCOPE = "https://management.azure.com/.default"
+TOKEN_REFRESH_MARGIN = 180.0
+# The background refresh starts this long before a token stops being fresh, so requests never wait on it.
+# Margin plus lead stays within the 300 seconds before expiry from which azure-identity stops
+# returning its cached token, otherwise the refresh would only get the same token back.
+TOKEN_REFRESH_LEAD = 120.0
+# Tokens closer than this to expiry are not handed out any more.
+TOKEN_MIN_LIFETIME = 60.0
+TOKEN_RETRY_INTERVAL = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class PrewarmedCredential:
+    """
+    Async token credential that serves cached tokens and refreshes them in the background.
+    Tokens are acquired eagerly at startup so no tool call waits on the
+    DefaultAzureCredential chain probe or an IMDS timeout.
+    """
+
+    def __init__(self, credential: DefaultAzureCredential, refresh_margin: float = TOKEN_REFRESH_MARGIN, store: SnapshotStore | None = None):
+        self._credential = credential
+        self._refresh_margin = refresh_margin
+        self._store = store
+        self._tokens: dict[tuple, AccessToken] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        # Keys whose last acquisition returned no newer token are not refreshed again before this time.
+        self._retry_at: dict[tuple, float] = {}
+        self.last_error: str | None = None
+
+    @property
+    def source(self) -> str | None:
+        """Name of the DefaultAzureCredential chain link that acquired the token."""
+        successful = getattr(self._credential, "_successful_credential", None)
+        return type(successful).__name__ if successful is not None else None
+
+    def _fresh(self, token: AccessToken | None) -> bool:
+        return token is not None and token.expires_on - time.time() > self._refresh_margin
+
+    @staticmethod
+    def _valid(token: AccessToken | None) -> bool:
+        return token is not None and token.expires_on - time.time() > TOKEN_MIN_LIFETIME
+
+    def _due(self, key: tuple) -> bool:
+        now = time.time()
+        return self._tokens[key].expires_on - now <= self._refresh_margin + TOKEN_REFRESH_LEAD and self._retry_at.get(key, 0.0) <= now
+
+    def _next_refresh(self, key: tuple) -> float:
+        return max(self._tokens[key].expires_on - self._refresh_margin - TOKEN_REFRESH_LEAD, self._retry_at.get(key, 0.0))
+
+    async def _acquire(self, key: tuple, scopes: tuple, kwargs: dict, force: bool = False) -> AccessToken:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            token = self._tokens.get(key)
+            if force or not self._fresh(token):
+                shared = await self._shared(key)
+                if self._fresh(shared) and (token is None or shared.expires_on > token.expires_on):
+                    token = shared
+                else:
+                    previous = token
+                    token = await self._credential.get_token(*scopes, **kwargs)
+                    if previous is not None and token.expires_on <= previous.expires_on:
+                        # The underlying credential still serves its cached token, ask again later.
+                        self._retry_at[key] = time.time() + TOKEN_RETRY_INTERVAL
+                    else:
+                        self._retry_at.pop(key, None)
+                    if self._private_store():
+                        await self._store.put(self._store_key(key), {"token": token.token, "expires_on": token.expires_on})
+                self._tokens[key] = token
+            return token
+
+    @staticmethod
+    def _store_key(key: tuple) -> str:
+        return "token:" + json.dumps(key, default=str)
+
+    def _private_store(self) -> bool:
+        """Tokens are only shared through a store that other users cannot read or plant tokens in."""
+        if self._store is None:
+            return False
+        if not self._store.private():
+            logger.warning("Not sharing azure tokens: %s is readable by other users", self._store.path)
+            return False
+        return True
+
+    async def _shared(self, key: tuple) -> AccessToken | None:
+        """Token acquired by another server process sharing the store, if any."""
+        if not self._private_store():
+            return None
+        snapshot = await self._store.get(self._store_key(key))
+        return AccessToken(snapshot.profile["token"], snapshot.profile["expires_on"]) if snapshot is not None else None
+
+    async def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        if kwargs.get("claims"):
+            return await self._credential.get_token(*scopes, **kwargs)
+        key = (scopes, tuple(sorted(kwargs.items())))
+        token = self._tokens.get(key)
+        if self._fresh(token):
+            return token
+        if self._valid(token):
+            # Serve the token while it is still valid and let the refresh catch up in the background.
+            self._refresh_in_background(key, scopes, kwargs)
+            return token
+        with metrics.phase("credential"):
+            return await self._acquire(key, scopes, kwargs)
+
+    def _refresh_in_background(self, key: tuple, scopes: tuple, kwargs: dict) -> None:
+        # After a failure, or when the last refresh returned the same token, the refresh loop retries on its own schedule.
+        if key in self._refreshing or self.last_error or self._retry_at.get(key, 0.0) > time.time():
+            return
+
+        async def refresh():
+            try:
+                await self._acquire(key, scopes, kwargs)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Failed to refresh azure token: %s", self.last_error)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    async def warm(self, *scopes: str) -> None:
+        """Acquire a token for the scopes, recording instead of raising failures."""
+        try:
+            await self.get_token(*(scopes or (ARM_SCOPE,)))
+            self.last_error = None
+            logger.info("Acquired azure token using %s", self.source)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.warning("Failed to acquire azure token: %s", self.last_error)
+
+    async def run_refresh(self) -> None:
+        """Refresh every cached token TOKEN_REFRESH_LEAD seconds before it stops being fresh."""
+        await self.warm(ARM_SCOPE)
+        while True:
+            if self._tokens:
+                wakeup = min(self._next_refresh(key) for key in self._tokens) - time.time()
+            else:
+                wakeup = TOKEN_RETRY_INTERVAL
+            await asyncio.sleep(max(wakeup, TOKEN_RETRY_INTERVAL if self.last_error else 1.0))
+            for key in list(self._tokens):
+                scopes, kwargs = key
+                if not self._due(key) and not self.last_error:
+                    continue
+                try:
+                    await self._acquire(key, scopes, dict(kwargs), force=True)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    logger.warning("Failed to refresh azure token: %s", self.last_error)
+            if not self._tokens:
+                await self.warm(ARM_SCOPE)
+
+    def status(self) -> dict:
+        return {
+            "source": self.source,
+            "tokens": [
+                {"scopes": list(scopes), "expiresInSeconds": int(token.expires_on - time.time())}
+                for (scopes, _), token in self._tokens.items()
+            ],
+            "lastError": self.last_error,
+        }
+
+    async def close(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        await self._credential.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
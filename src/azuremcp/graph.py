@@ -1,48 +1,341 @@
-from context import app_lifespan
+from server import server
 
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
 from pydantic import Field
-from mcp.server.fastmcp import Context, FastMCP
-from azure.mgmt.resourcegraph.aio import ResourceGraphClient
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import parse_resource_id
+from baseline import diff, utcnow
+from batch import fetch_profile
+from cache import BypassCache
 
 # Constants
+RESOURCE_GRAPH_CLIENT = "azure.mgmt.resourcegraph.aio:ResourceGraphClient"
 USER_AGENT = "azure-graph-mcp-server/1.0"
+GRAPH_PAGE_SIZE = 1000
+GRAPH_MAX_ROWS = 5000
+# Resource graph accepts at most 1000 subscriptions per request.
+GRAPH_SCOPES_PER_REQUEST = 1000
+# Concurrent batches of one call; the resource graph bucket of the shared throttle keeps all calls within the quota.
+GRAPH_MAX_CONCURRENCY = 4
+# Logger name of the log notifications carrying streamed rows.
+GRAPH_ROWS_LOGGER = "azure-resource-graph"
+CHANGES_IDS_PER_QUERY = 200
+CHANGES_MAX_CONCURRENCY = 8
+# Resource changes can show up in resource graph after a delay, so each check overlaps the previous one.
+CHANGES_INGESTION_DELAY = timedelta(minutes=5)
 
-# Initialize FastMCP server
-azureGraph = FastMCP(
-    "Azure graph service MCP server",
-    "This mcp server will send query to Azure graph service and it will return azure resource profile in json format",
-    dependencies=["azure-mgmt-resourcegraph", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
 
-@azureGraph.tool(
+def _scopes(subscriptions: list[str] | None, managementGroups: list[str] | None) -> list[dict]:
+    """Split subscriptions and management groups into scopes of at most GRAPH_SCOPES_PER_REQUEST entries."""
+    scopes = []
+    for name, values in (("subscriptions", subscriptions), ("management_groups", managementGroups)):
+        values = list(dict.fromkeys(values or []))
+        scopes.extend({name: values[start:start + GRAPH_SCOPES_PER_REQUEST]} for start in range(0, len(values), GRAPH_SCOPES_PER_REQUEST))
+    return scopes or [{}]
+
+
+async def query_resource_graph(
+    clients,
+    query: str,
+    pageSize: int,
+    maxRows: int,
+    skip: int = 0,
+    skipToken: str | None = None,
+    subscriptions: list[str] | None = None,
+    managementGroups: list[str] | None = None,
+    progress: Callable[[float, float | None], Awaitable] | None = None,
+    stream: Callable[[dict], Awaitable] | None = None,
+) -> dict:
+    """
+    Page through an azure resource graph query.
+    Subscriptions and management groups are split into batches that are queried concurrently,
+    and rows returned by more than one batch are merged by id.
+    With stream the rows of every page are handed to it as soon as they arrive, and only
+    the counts and skipToken are returned. Nothing here depends on the request of one
+    caller, so the query can be shared by concurrent calls and refreshed in the background.
+    Args:
+            clients (ClientPool): The client pool of the app context.
+            query (str): Azure resource graph query.
+            pageSize (int): The number of rows fetched per request.
+            maxRows (int): The maximum number of rows returned.
+            skip (int): The number of rows to skip from the start of the result.
+            skipToken (str): The skipToken returned by a previous query.
+            subscriptions (list[str]): The subscriptions to query, the default scope of the credential when empty.
+            managementGroups (list[str]): The management groups to query.
+            progress (Callable): Receives the number of rows fetched and the number expected.
+            stream (Callable): Receives {batch, offset, rows} of every page instead of returning the rows.
+    Returns:
+            dict: The rows in JSON format, the total number of records and the skipToken of the next page if any.
+    """
+    from azure.mgmt.resourcegraph.models import QueryRequest, QueryRequestOptions, ResultFormat
+
+    scopes = _scopes(subscriptions, managementGroups)
+    if len(scopes) > 1 and (skip or skipToken):
+        raise ValueError("skip and skipToken can only be used when the scope fits in a single batch.")
+    semaphore = asyncio.Semaphore(GRAPH_MAX_CONCURRENCY)
+    fetched = [0]
+    totals = {}
+    streamed, streamedIds = [0], set()
+
+    async def send(index: int, rows: list) -> None:
+        """Send the rows not sent by another batch yet, up to maxRows in total."""
+        chunk = []
+        for row in rows:
+            rowId = row.get("id").lower() if isinstance(row, dict) and row.get("id") else None
+            if rowId is not None:
+                if rowId in streamedIds:
+                    continue
+                streamedIds.add(rowId)
+            chunk.append(row)
+        chunk = chunk[:maxRows - streamed[0]]
+        if chunk:
+            await stream({"batch": index, "offset": streamed[0], "rows": chunk})
+            streamed[0] += len(chunk)
+
+    async def run(client, index: int, scope: dict) -> tuple[list, str | None]:
+        data, token = list(), skipToken
+        async with semaphore:
+            while len(data) < maxRows:
+                result = await client.resources(
+                    QueryRequest(
+                        query=query,
+                        **scope,
+                        options=QueryRequestOptions(
+                            top=min(pageSize, maxRows - len(data)),
+                            skip=None if token else skip or None,
+                            skip_token=token,
+                            result_format=ResultFormat.OBJECT_ARRAY,
+                        ),
+                    )
+                )
+                data.extend(result.data)
+                if stream is not None:
+                    await send(index, result.data)
+                totals[index] = result.total_records
+                token = result.skip_token
+                fetched[0] += len(result.data)
+                if progress is not None:
+                    await progress(fetched[0], min(sum(totals.values()), maxRows * len(scopes)))
+                if not token:
+                    break
+        return data, token
+
+    async with clients.client(
+        RESOURCE_GRAPH_CLIENT,
+        user_agent=USER_AGENT,
+    ) as client:
+        results = await asyncio.gather(*[run(client, index, scope) for index, scope in enumerate(scopes)])
+
+    if stream is not None:
+        response = {
+            "data": [],
+            "count": streamed[0],
+            "totalRecords": sum(totals.values()),
+            "skipToken": results[0][1] if len(results) == 1 else None,
+            "streamed": True,
+        }
+        if len(results) > 1:
+            response.update(batches=len(scopes), truncatedBatches=sum(1 for _, token in results if token))
+        return response
+
+    if len(results) == 1:
+        data, skipToken = results[0]
+        return {
+            "data": data,
+            "count": len(data),
+            "totalRecords": totals.get(0),
+            "skipToken": skipToken,
+        }
+
+    data, seen = list(), set()
+    for rows, _ in results:
+        for row in rows:
+            rowId = row.get("id") if isinstance(row, dict) else None
+            if rowId is not None:
+                if rowId.lower() in seen:
+                    continue
+                seen.add(rowId.lower())
+            data.append(row)
+    return {
+        "data": data[:maxRows],
+        "count": min(len(data), maxRows),
+        "totalRecords": sum(totals.values()),
+        "skipToken": None,
+        "batches": len(scopes),
+        "truncatedBatches": sum(1 for _, token in results if token),
+    }
+
+
+@server.tool(
     name="Search azure graph service",
-    description="Get azure profile in json format from azure rest graph service, send azure resource graph query to azure graph service and return the result in json format.",
+    description="Get azure profile in json format from azure rest graph service, send azure resource graph query to azure graph service and return the result in json format. "
+    "Results are paged: pageSize rows are fetched per request until maxRows rows are collected. "
+    "When more rows are available the returned skipToken can be sent back to continue from where the previous call stopped. "
+    "Subscriptions and management groups can be given explicitly to query a whole fleet in one call: "
+    "they are split into batches queried concurrently and rows are merged by id. skip and skipToken only apply to a single batch. "
+    "With streamRows the rows of every page are sent as they arrive in log notifications of the azure-resource-graph logger, "
+    "with data {batch, offset, rows}, and the result only carries the counts and skipToken. "
+    "With bypassCache the query is sent to azure graph service even when a fresh result of it is stored.",
 )
 async def get_azure_resource_profile(
     ctx: Context,
     query: str = Field(
         description="Azure resource graph query to be sent to azure graph service.",
     ),
-) -> list:
+    pageSize: int = Field(default=GRAPH_PAGE_SIZE, ge=1, le=GRAPH_PAGE_SIZE, description="The number of rows fetched per request."),
+    maxRows: int = Field(default=GRAPH_MAX_ROWS, ge=1, description="The maximum number of rows returned by this call."),
+    skip: int = Field(default=0, ge=0, description="The number of rows to skip from the start of the result. Ignored when skipToken is set."),
+    skipToken: str | None = Field(default=None, description="The skipToken returned by a previous call to continue the same query."),
+    subscriptions: list[str] = Field(default_factory=list, description="The subscription ids to query. Defaults to the subscriptions the credential can access."),
+    managementGroups: list[str] = Field(default_factory=list, description="The management group ids to query."),
+    streamRows: bool = Field(default=False, description="Send the rows of every page in log notifications as they arrive instead of returning them at the end."),
+    bypassCache: BypassCache = False,
+) -> dict:
     """
     Azure graph service 
     Args:
+            query (str): Azure resource graph query.
+            pageSize (int): The number of rows fetched per request.
+            maxRows (int): The maximum number of rows returned by this call.
+            skip (int): The number of rows to skip from the start of the result.
+            skipToken (str): The skipToken returned by a previous call.
+            subscriptions (list[str]): The subscription ids to query.
+            managementGroups (list[str]): The management group ids to query.
+            streamRows (bool): Send the rows in log notifications as they arrive.
+            bypassCache (bool): Skip the stored result and query azure graph service.
+    Returns:
+            dict: The rows in JSON format, the total number of records and the skipToken of the next page if any.
+    """
+    app = ctx.request_context.lifespan_context
+    if streamRows:
+        # The rows go to the session of this call, so it is neither coalesced nor answered from the store.
+
+        async def send(data: dict) -> None:
+            await ctx.session.send_log_message(level="info", data=data, logger=GRAPH_ROWS_LOGGER)
+
+        return await query_resource_graph(app.clients, query, pageSize, maxRows, skip, skipToken, subscriptions, managementGroups, progress=ctx.report_progress, stream=send)
+    key = json.dumps(["graph", query, pageSize, maxRows, skip, skipToken, sorted(subscriptions), sorted(managementGroups)])
+
+    def run():
+        # Shared by concurrent callers and run again by background revalidation, so it reports
+        # progress to whoever is listening to the key instead of to the context of this call.
+        return app.flights.do(key, lambda: query_resource_graph(app.clients, query, pageSize, maxRows, skip, skipToken, subscriptions, managementGroups, progress=app.flights.progress(key)))
+
+    async with app.flights.listen(key, ctx.report_progress):
+        if app.store is not None:
+            return await app.store.get_or_fetch(key, run, bypass=bypassCache)
+        return await run()
 
+
+def _changes_query(resourceIds: list[str], since: datetime) -> str:
+    ids = ", ".join("'" + resourceId.lower().replace("'", "") + "'" for resourceId in resourceIds)
+    return (
+        "resourcechanges"
+        " | extend changeTime = todatetime(properties.changeAttributes.timestamp),"
+        " targetResourceId = tolower(tostring(properties.targetResourceId)),"
+        " changeType = tostring(properties.changeType)"
+        f" | where changeTime > datetime({since.isoformat()})"
+        f" | where targetResourceId in ({ids})"
+        " | summarize lastChange = max(changeTime), changeTypes = make_set(changeType) by targetResourceId"
+    )
+
+
+@server.tool(
+    name="Get-Azure-Resource-Changes",
+    description="Get what changed on a set of azure resources since they were last seen, using the azure resource graph resourcechanges table. "
+    "The first call for a resource id records its current profile as the baseline. "
+    "Later calls query resourcechanges for the tracked ids since the baseline (or since the given timestamp), re-fetch only the resources that changed "
+    "and return a compact diff per resource keyed by dotted path, then move the baseline forward. Deleted resources are reported and dropped from the baseline.",
+)
+async def get_azure_resource_changes(
+    ctx: Context,
+    resourceIds: list[str] = Field(description="The Azure resource ids to track."),
+    since: str | None = Field(default=None, description="ISO 8601 timestamp to look for changes from instead of the baseline time, e.g. 2025-01-31T00:00:00Z."),
+) -> dict:
+    """
+    Azure resource changes since the baseline.
+    Args:
+            resourceIds (list[str]): The Azure resource ids to track.
+            since (str): ISO 8601 timestamp to look for changes from.
     Returns:
-            str: The Azure resource profile in JSON format.
+            dict: The added, changed and deleted resources with a diff per changed resource in JSON format.
     """
-    result = None
-    async with ResourceGraphClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        user_agent=USER_AGENT,
-    ) as client:
-        result = await client.resources(
-			query=query,
-		)
-        await client.close()
-    
-    data = list()
-    for item in result.data:
-        data.append(item)
-    return data
\ No newline at end of file
+    baseline = ctx.request_context.lifespan_context.baseline
+    sinceTime = datetime.fromisoformat(since.replace("Z", "+00:00")) if since else None
+    semaphore = asyncio.Semaphore(CHANGES_MAX_CONCURRENCY)
+    startedAt = utcnow()
+
+    async def refetch(resourceId: str) -> dict:
+        async with semaphore:
+            return await fetch_profile(ctx, resourceId, bypassCache=True)
+
+    added, errors = [], []
+    entries = dict(zip(resourceIds, await asyncio.gather(*map(baseline.get, resourceIds))))
+    tracked = [resourceId for resourceId in resourceIds if entries[resourceId] is not None]
+    untracked = [resourceId for resourceId in resourceIds if entries[resourceId] is None]
+    for resourceId, profile in zip(untracked, await asyncio.gather(*map(refetch, untracked), return_exceptions=True)):
+        if isinstance(profile, Exception):
+            errors.append({"id": resourceId, "error": f"{type(profile).__name__}: {profile}"})
+        else:
+            await baseline.put(resourceId, profile, startedAt)
+            added.append(resourceId)
+
+    changes = {}
+    if tracked:
+        earliest = sinceTime or min(entries[resourceId].fetchedAt for resourceId in tracked) - CHANGES_INGESTION_DELAY
+        for start in range(0, len(tracked), CHANGES_IDS_PER_QUERY):
+            batch = tracked[start:start + CHANGES_IDS_PER_QUERY]
+            result = await query_resource_graph(
+                ctx.request_context.lifespan_context.clients,
+                _changes_query(batch, earliest),
+                GRAPH_PAGE_SIZE,
+                GRAPH_MAX_ROWS,
+                subscriptions=[parse_resource_id(resourceId)["subscription"] for resourceId in batch],
+                progress=ctx.report_progress,
+            )
+            for row in result["data"]:
+                changes[row["targetResourceId"]] = row
+
+    changed, deleted = [], []
+    candidates = [resourceId for resourceId in tracked if resourceId.lower() in changes]
+    profiles = await asyncio.gather(
+        *[refetch(resourceId) for resourceId in candidates if "Delete" not in changes[resourceId.lower()]["changeTypes"]],
+        return_exceptions=True,
+    )
+    profiles = iter(profiles)
+    for resourceId in candidates:
+        change = changes[resourceId.lower()]
+        if "Delete" in change["changeTypes"]:
+            await baseline.forget(resourceId)
+            deleted.append({"id": resourceId, "changeTime": change["lastChange"]})
+            continue
+        profile = next(profiles)
+        if isinstance(profile, Exception):
+            errors.append({"id": resourceId, "error": f"{type(profile).__name__}: {profile}"})
+            continue
+        profileDiff = diff(entries[resourceId].profile, profile)
+        await baseline.put(resourceId, profile, startedAt)
+        # Changes already seen by an earlier, overlapping check leave an empty diff.
+        if profileDiff:
+            changed.append({
+                "id": resourceId,
+                "changeTime": change["lastChange"],
+                "changeTypes": change["changeTypes"],
+                "diff": profileDiff,
+            })
+    for resourceId in tracked:
+        if resourceId.lower() not in changes:
+            await baseline.touch(resourceId, startedAt)
+
+    return {
+        "since": sinceTime.isoformat() if sinceTime else None,
+        "checkedAt": startedAt.isoformat(),
+        "tracked": len(tracked),
+        "added": added,
+        "changed": changed,
+        "deleted": deleted,
+        "errors": errors,
+    }
\ No newline at end of file
@@ -0,0 +1,139 @@
+import bisect
+import contextvars
+import functools
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from contextlib import contextmanager
+from azure.core.pipeline import PipelineRequest, PipelineResponse
+from azure.core.pipeline.policies import AsyncHTTPPolicy
+
+# Constants
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PREFIX = "azure_mcp"
+
+# Name of the tool being served, inherited by the tasks it starts.
+current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("current_tool", default="")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: tuple[tuple[str, str], ...]) -> list[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Process wide latency histograms and counters labelled by tool.
+    Tools are wrapped by instrument, and the credential, client pool, pipeline
+    and cache record their phases and counters under the tool being served.
+    """
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = defaultdict(float)
+        self._help: dict[str, tuple[str, str]] = {}
+
+    def observe(self, name: str, value: float, help: str = "", **labels) -> None:
+        self._help.setdefault(name, ("histogram", help))
+        key = (name, (("tool", current_tool.get()),) + tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, help: str = "", **labels) -> None:
+        self._help.setdefault(name, ("counter", help))
+        self._counters[(name, (("tool", current_tool.get()),) + tuple(sorted(labels.items())))] += value
+
+    @contextmanager
+    def phase(self, phase: str):
+        """Time a phase of the current tool call: credential, client, arm, serialize or parse."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("phase_duration_seconds", time.perf_counter() - start, "Duration of a phase of a tool call.", phase=phase)
+
+    def instrument(self, fn: Callable, name: str) -> Callable:
+        """Wrap a tool coroutine function to record its latency, calls and errors."""
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = current_tool.set(name)
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                self.increment("tool_errors_total", help="Tool calls that raised.", error=type(e).__name__)
+                raise
+            finally:
+                self.observe("tool_duration_seconds", time.perf_counter() - start, "Duration of tool calls.")
+                self.increment("tool_calls_total", help="Tool calls.")
+                current_tool.reset(token)
+
+        return wrapper
+
+    def prometheus(self) -> str:
+        """The registry in Prometheus text exposition format."""
+        series = defaultdict(list)
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            series[name].extend(histogram.lines(f"{METRICS_PREFIX}_{name}", labels))
+        for (name, labels), value in sorted(self._counters.items()):
+            series[name].append(f"{METRICS_PREFIX}_{name}{_labels(labels)} {value}")
+        lines = []
+        for name in sorted(series):
+            kind, help = self._help[name]
+            lines.append(f"# HELP {METRICS_PREFIX}_{name} {help}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name} {kind}")
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsPolicy(AsyncHTTPPolicy):
+    """Pipeline policy recording every request attempt: latency, status code and response bytes."""
+
+    async def send(self, request: PipelineRequest) -> PipelineResponse:
+        with metrics.phase("arm"):
+            response = await self.next.send(request)
+        http_response = response.http_response
+        metrics.increment("upstream_requests_total", help="Requests sent to azure, including retries.", status=str(http_response.status_code))
+        if http_response.status_code == 429:
+            metrics.increment("upstream_throttled_total", help="Requests throttled by azure with 429.")
+        try:
+            size = len(http_response.body())
+        except Exception:
+            size = int(http_response.headers.get("Content-Length") or 0)
+        metrics.increment("upstream_response_bytes_total", size, "Bytes received from azure.")
+        return response
+
+
+# Shared by every session of the process.
+metrics = Metrics()
@@ -1,23 +1,19 @@
-from context import app_lifespan
+from server import server
 
 from pydantic import Field
-from mcp.server.fastmcp import Context, FastMCP
-from azure.mgmt.network.aio import NetworkManagementClient
+from cache import BypassCache, conditional_headers
+from projection import Fields, JmesPath, Summary, project
+from rawjson import get_raw
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import resource_id
 
 # Constants
+NETWORK_CLIENT = "azure.mgmt.network.aio:NetworkManagementClient"
+NETWORK_API_VERSION = "2024-05-01"
 USER_AGENT = "azure-network-mcp-server/1.0"
 
-# Initialize FastMCP server
-virtualNetwork = FastMCP(
-    "Azure VirtualNetwork MCP server",
-    "This mcp server will operate on Azure virtual network resources.Put subscriptionid, and resource name and get the azure resource profile. SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id."
-    "The resource id should contain providers/Microsoft.Network/networkProfiles",
-    dependencies=["azure-mgmt-network", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
-
 
-@virtualNetwork.tool(
+@server.tool(
     name="Get-Azure-VirtualNetwork-Profile",
     description="Get Azure Virtual Network profile in JSON format from azure rest api. It contains all of virtual network configurations."
     "SubscriptionId, resourceGroupName and virtualNetworkName are required parameters. "
@@ -32,6 +28,10 @@ async def get_azure_virtualnetwork_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     virtualNetworkName: str = Field(description="The Azure Virtual Network name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure Virtual Network profile.
@@ -39,33 +39,41 @@ async def get_azure_virtualnetwork_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             virtualNetworkName (str): The Azure Virtual Network name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The Azure Virtual Network profile in JSON format.
     """
-    vnet = None
-    async with NetworkManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        vnet = await client.virtual_networks.get(
-            resource_group_name=resourceGroupName,
-            virtual_network_name=virtualNetworkName,
-        )
-        await client.close()
-    return vnet.serialize(keep_readonly=True)
-
-# Initialize FastMCP server
-routeTable = FastMCP(
-    "Azure RouteTable MCP server",
-    "This mcp server will operate on Azure RouteTable resources.Put subscriptionid, and resource name and get the azure resource profile. SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id."
-    "The resource id should contain providers/Microsoft.Network/routeTables",
-    dependencies=["azure-mgmt-network", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.Network",
+        type="virtualNetworks",
+        name=virtualNetworkName,
+    )
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            NETWORK_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, NETWORK_API_VERSION, etag)
+            return await client.virtual_networks.get(
+                resource_group_name=resourceGroupName,
+                virtual_network_name=virtualNetworkName,
+                headers=conditional_headers(etag),
+            )
 
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
 
-@routeTable.tool(
+
+@server.tool(
     name="Get-Azure-RouteTable Profile",
     description="Get Azure Route Table profile in JSON format from azure rest api. It contains all of route table configurations."
     "SubscriptionId, resourceGroupName and routeTableName are required parameters. "
@@ -80,6 +88,10 @@ async def get_azure_routetable_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     routeTableName: str = Field(description="The Azure Route Table name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure Route Table profile.
@@ -87,35 +99,41 @@ async def get_azure_routetable_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             routeTableName (str): The Azure Route Table name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The Azure Route Table profile in JSON format.
     """
-    routeTable = None
-    async with NetworkManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        routeTable = await client.route_tables.get(
-            resource_group_name=resourceGroupName,
-            route_table_name=routeTableName,
-        )
-        await client.close()
-    return routeTable.serialize(keep_readonly=True)
-
-
-
-# Initialize FastMCP server
-securityGroup = FastMCP(
-    "Azure network security group MCP server",
-    "This mcp server will operate on Azure NetworkSecurityGroup resources.Put subscriptionid, and resource name and get the azure resource profile. SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id."
-    "The resource id should contain providers/Microsoft.Network/networkSecurityGroups",
-    dependencies=["azure-mgmt-network", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.Network",
+        type="routeTables",
+        name=routeTableName,
+    )
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            NETWORK_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, NETWORK_API_VERSION, etag)
+            return await client.route_tables.get(
+                resource_group_name=resourceGroupName,
+                route_table_name=routeTableName,
+                headers=conditional_headers(etag),
+            )
+
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
 
 
-@securityGroup.tool(
+@server.tool(
     name="Get-Azure-NetworkSecurityGroups-Profile",
     description="Get Azure NetworkSecurityGroups profile in JSON format from azure rest api. It contains all of nsg configurations."
     "SubscriptionId, resourceGroupName and routeTableName are required parameters. "
@@ -130,6 +148,10 @@ async def get_azure_networksecuritygroups_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     networkSecurityGroupsName: str = Field(description="The Azure NetworkSecurityGroups name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure NetworkSecurityGroups profile.
@@ -137,34 +159,41 @@ async def get_azure_networksecuritygroups_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             networkSecurityGroupsName (str): The Azure NetworkSecurityGroups name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The Azure NetworkSecurityGroups profile in JSON format.
     """
-    networkSecurityGroup = None
-    async with NetworkManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        networkSecurityGroup = await client.network_security_groups.get(
-            resource_group_name=resourceGroupName,
-            network_security_group_name=networkSecurityGroupsName,
-        )
-        await client.close()
-    return networkSecurityGroup.serialize(keep_readonly=True)
-
-
-# Initialize FastMCP server
-natGateway = FastMCP(
-    "Azure nat Gateway MCP server",
-    "This mcp server will operate on Azure NATGateway resources.Put subscriptionid, and resource name and get the azure resource profile. SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id."
-    "The resource id should contain providers/Microsoft.Network/natGateways",
-    dependencies=["azure-mgmt-network", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.Network",
+        type="networkSecurityGroups",
+        name=networkSecurityGroupsName,
+    )
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            NETWORK_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, NETWORK_API_VERSION, etag)
+            return await client.network_security_groups.get(
+                resource_group_name=resourceGroupName,
+                network_security_group_name=networkSecurityGroupsName,
+                headers=conditional_headers(etag),
+            )
 
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
 
-@natGateway.tool(
+
+@server.tool(
     name="Get-Azure-NATGateway-Profile",
     description="Get Azure NATGateway profile in JSON format from azure rest api. It contains all of nsg configurations."
     "SubscriptionId, resourceGroupName and routeTableName are required parameters. "
@@ -179,6 +208,10 @@ async def get_azure_natGateway_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     NATGatewayName: str = Field(description="The Azure NATGatewayName name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure NATGateway profile.
@@ -186,33 +219,41 @@ async def get_azure_natGateway_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             NATGatewayName (str): The Azure NATGateway name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The Azure NATGateway profile in JSON format.
     """
-    natGateway = None
-    async with NetworkManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        natGateway = await client.nat_gateways.get(
-            resource_group_name=resourceGroupName,
-            nat_gateway_name=NATGatewayName,
-        )
-        await client.close()
-    return natGateway.serialize(keep_readonly=True)
-
-# Initialize FastMCP server
-loadBalancer = FastMCP(
-    "Azure loadBalancer MCP server",
-    "This mcp server will operate on Azure loadBalancer resources.Put subscriptionid, and resource name and get the azure resource profile. SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id."
-    "The resource id should contain providers/Microsoft.Network/loadBalancers",
-    dependencies=["azure-mgmt-network", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.Network",
+        type="natGateways",
+        name=NATGatewayName,
+    )
 
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            NETWORK_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, NETWORK_API_VERSION, etag)
+            return await client.nat_gateways.get(
+                resource_group_name=resourceGroupName,
+                nat_gateway_name=NATGatewayName,
+                headers=conditional_headers(etag),
+            )
 
-@loadBalancer.tool(
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
+
+
+@server.tool(
     name="Get-Azure-loadBalancer-Profile",
     description="Get Azure loadBalancer profile in JSON format from azure rest api. It contains all of nsg configurations."
     "SubscriptionId, resourceGroupName and routeTableName are required parameters. "
@@ -227,6 +268,10 @@ async def get_azure_loadBalancer_profile(
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
     loadBalancerName: str = Field(description="The Azure loadBalancer name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure loadBalancer profile.
@@ -234,19 +279,36 @@ async def get_azure_loadBalancer_profile(
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
             loadBalancerName (str): The Azure loadBalancer name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The Azure loadBalancer profile in JSON format.
     """
-    loadBalancer = None
-    async with NetworkManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        loadBalancer = await client.load_balancers.get(
-            resource_group_name=resourceGroupName,
-            load_balancer_name=loadBalancerName,
-        )
-        await client.close()
-    return loadBalancer.serialize(keep_readonly=True)
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(
+        subscription=subscriptionId,
+        resource_group=resourceGroupName,
+        namespace="Microsoft.Network",
+        type="loadBalancers",
+        name=loadBalancerName,
+    )
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            NETWORK_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, NETWORK_API_VERSION, etag)
+            return await client.load_balancers.get(
+                resource_group_name=resourceGroupName,
+                load_balancer_name=loadBalancerName,
+                headers=conditional_headers(etag),
+            )
+
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
 
@@ -0,0 +1,21 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Constants
+# Threads serializing profiles off the event loop, 0 serializes inline.
+SERIALIZE_THREADS = int(os.environ.get("AZURE_MCP_SERIALIZE_THREADS", "0"))
+
+_executor = ThreadPoolExecutor(SERIALIZE_THREADS, thread_name_prefix="serialize") if SERIALIZE_THREADS > 0 else None
+
+
+async def offload(fn, *args, **kwargs):
+    """
+    Run CPU heavy work such as serializing a large profile on the serialization threads,
+    so one session does not stall every other session of the process. Runs inline when
+    AZURE_MCP_SERIALIZE_THREADS is not set.
+    """
+    if _executor is None:
+        return fn(*args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
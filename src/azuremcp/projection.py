@@ -0,0 +1,78 @@
+import jmespath
+from typing import Annotated
+from pydantic import Field
+
+# Projection parameters shared by the profile getters.
+Fields = Annotated[list[str] | None, Field(description="Dotted paths of the profile to return, e.g. properties.provisioningState. Paths crossing a list apply to every item. Returns the whole profile when not set.")]
+JmesPath = Annotated[str | None, Field(description="JMESPath expression applied to the profile before it is returned.")]
+Summary = Annotated[bool, Field(description="Drop null and empty fields from the profile.")]
+
+
+def _select_path(value, path: list[str]):
+    """Copy of value keeping only a dotted path, None when the path does not exist."""
+    if not path:
+        return value
+    if isinstance(value, list):
+        # One projected item per list item, so the paths selected from the same item stay together.
+        return [{} if item is None else item for item in (_select_path(item, path) for item in value)]
+    if isinstance(value, dict) and path[0] in value:
+        selected = _select_path(value[path[0]], path[1:])
+        return {path[0]: selected} if selected is not None or len(path) == 1 else None
+    return None
+
+
+def _merge(target, value):
+    """Merge two selections of the same profile into new containers."""
+    if isinstance(target, dict) and isinstance(value, dict):
+        merged = dict(target)
+        for key, item in value.items():
+            merged[key] = _merge(merged[key], item) if key in merged else item
+        return merged
+    if isinstance(target, list) and isinstance(value, list) and len(target) == len(value):
+        return [_merge(old, new) for old, new in zip(target, value)]
+    return value if target is None else target
+
+
+def select(profile: dict, fields: list[str]) -> dict:
+    """
+    Keep only the given dotted paths of a profile, e.g. properties.networkProfile.outboundType.
+    Paths crossing a list apply to every item of the list and keep one item per item.
+    The profile is not modified.
+    """
+    result: dict = {}
+    for field in fields:
+        path = [key for key in field.split(".") if key]
+        value = _select_path(profile, path)
+        if path and value is not None:
+            result = _merge(result, value)
+    return result
+
+
+def prune(value):
+    """Drop null and empty fields recursively."""
+    if isinstance(value, dict):
+        pruned = {key: prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [item for item in (prune(item) for item in value) if item not in (None, "", [], {})]
+    return value
+
+
+def project(profile: dict, fields: list[str] | None = None, jmesPath: str | None = None, summary: bool = False):
+    """
+    Shrink a resource profile before it is returned to the client.
+    Args:
+            profile (dict): The resource profile in JSON format.
+            fields (list[str]): Dotted paths to keep.
+            jmesPath (str): JMESPath expression applied after the dotted paths.
+            summary (bool): Drop null and empty fields.
+    Returns:
+            The projected profile.
+    """
+    if fields:
+        profile = select(profile, fields)
+    if jmesPath:
+        profile = jmespath.search(jmesPath, profile)
+    if summary:
+        profile = prune(profile)
+    return profile
@@ -0,0 +1,65 @@
+import json
+from azure.core.exceptions import (
+    ClientAuthenticationError,
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+    map_error,
+)
+from azure.core.rest import HttpRequest
+from cache import conditional_headers
+from metrics import metrics
+from offload import offload
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Constants
+ERROR_MAP = {
+    304: ResourceNotModifiedError,
+    401: ClientAuthenticationError,
+    404: ResourceNotFoundError,
+    409: ResourceExistsError,
+}
+
+
+def loads(body: bytes | str):
+    """Parse JSON with orjson when it is installed."""
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps(value) -> str:
+    """Encode JSON with orjson when it is installed."""
+    return orjson.dumps(value).decode() if orjson is not None else json.dumps(value, separators=(",", ":"))
+
+
+async def get_raw(client, resourceId: str, apiVersion: str, etag: str | None = None) -> dict:
+    """
+    GET a resource through the client pipeline and return the response body as is.
+    This skips the SDK model round trip and keeps fields the pinned SDK does not model.
+    Args:
+            client: A pooled Azure management client.
+            resourceId (str): The Azure resource id.
+            apiVersion (str): The api-version of the resource type.
+            etag (str): The cached etag, answered with 304 when unchanged.
+    Returns:
+            dict: The resource profile in JSON format.
+    """
+    # The generated clients expose send_request on their pipeline client only, and
+    # the multi-api ones do not wrap it at all.
+    pipeline = client._client
+    request = HttpRequest(
+        "GET",
+        pipeline.format_url(resourceId),
+        params={"api-version": apiVersion},
+        headers={"Accept": "application/json", **conditional_headers(etag)},
+    )
+    response = await pipeline.send_request(request)
+    if response.status_code != 200:
+        map_error(status_code=response.status_code, response=response, error_map=ERROR_MAP)
+        raise HttpResponseError(response=response)
+    with metrics.phase("parse"):
+        return await offload(loads, response.content)
@@ -0,0 +1,393 @@
+from server import server
+
+import asyncio
+import bisect
+import ipaddress
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pydantic import BaseModel, Field
+from mcp.server.fastmcp import Context
+from batch import fetch_profile
+
+# Constants
+COMPILED_CACHE_SIZE = 64
+MAX_PORT = 65535
+AZURE_LOAD_BALANCER_PREFIXES = ["168.63.129.16/32"]
+# Azure drops traffic to these prefixes unless a virtual network or user route covers them.
+SYSTEM_NONE_ROUTE_PREFIXES = ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "100.64.0.0/10"]
+ANY_ADDRESS = ("*", "any", "0.0.0.0/0", "::/0")
+ANY_PORT = [(0, MAX_PORT)]
+# Protocols whose flows are matched against the port ranges of the rules.
+PORT_PROTOCOLS = ("tcp", "udp")
+
+
+def _ranges(prefixes) -> list[tuple[int, int, int]]:
+    ranges = []
+    for prefix in prefixes:
+        network = ipaddress.ip_network(prefix, strict=False)
+        ranges.append((network.version, int(network.network_address), int(network.broadcast_address)))
+    return ranges
+
+
+def _is_prefix(value: str) -> bool:
+    try:
+        ipaddress.ip_network(value, strict=False)
+        return True
+    except ValueError:
+        return False
+
+
+def _port_ranges(single: str | None, many: list[str] | None) -> list[tuple[int, int]]:
+    ranges = []
+    for value in [single] + list(many or []):
+        if not value:
+            continue
+        if value == "*":
+            return ANY_PORT
+        low, _, high = value.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges or ANY_PORT
+
+
+@dataclass
+class TagContext:
+    """Address ranges of service tags and application security groups that can be resolved."""
+
+    virtualNetwork: list[tuple[int, int, int]] = field(default_factory=list)
+    serviceTags: dict[str, list[tuple[int, int, int]]] = field(default_factory=dict)
+    applicationSecurityGroups: dict[str, list[tuple[int, int, int]]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, vnetAddressPrefixes: list[str], serviceTags: dict[str, list[str]], applicationSecurityGroups: dict[str, list[str]]) -> "TagContext":
+        tags = {tag.lower(): _ranges(prefixes) for tag, prefixes in serviceTags.items()}
+        tags.setdefault("azureloadbalancer", _ranges(AZURE_LOAD_BALANCER_PREFIXES))
+        return cls(
+            virtualNetwork=_ranges(vnetAddressPrefixes),
+            serviceTags=tags,
+            applicationSecurityGroups={asgId.lower(): _ranges(ips) for asgId, ips in applicationSecurityGroups.items()},
+        )
+
+
+@dataclass
+class AddressSet:
+    ranges: list[tuple[int, int, int]] = field(default_factory=list)
+    any: bool = False
+    internet: bool = False
+    virtualNetwork: list[tuple[int, int, int]] = field(default_factory=list)
+    unresolved: list[str] = field(default_factory=list)
+
+    @classmethod
+    def compile(cls, single: str | None, many: list[str] | None, groups: list[dict] | None, tags: TagContext) -> "AddressSet":
+        addresses = cls()
+        for value in [single] + list(many or []):
+            if not value:
+                continue
+            if value.lower() in ANY_ADDRESS:
+                addresses.any = True
+            elif _is_prefix(value):
+                addresses.ranges.extend(_ranges([value]))
+            elif value.lower() == "virtualnetwork" and tags.virtualNetwork:
+                addresses.ranges.extend(tags.virtualNetwork)
+            elif value.lower() == "internet":
+                addresses.internet = True
+                addresses.virtualNetwork = tags.virtualNetwork
+            elif value.lower() in tags.serviceTags:
+                addresses.ranges.extend(tags.serviceTags[value.lower()])
+            else:
+                addresses.unresolved.append(value)
+        for group in groups or []:
+            groupId = (group.get("id") or "").lower()
+            if groupId in tags.applicationSecurityGroups:
+                addresses.ranges.extend(tags.applicationSecurityGroups[groupId])
+            else:
+                addresses.unresolved.append(group.get("id"))
+        return addresses
+
+    def match(self, address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool | None:
+        """True or False when decidable, None when only an unresolved tag could match."""
+        if self.any:
+            return True
+        version, value = address.version, int(address)
+        for rangeVersion, low, high in self.ranges:
+            if rangeVersion == version and low <= value <= high:
+                return True
+        if self.internet and address.is_global and not any(
+            rangeVersion == version and low <= value <= high for rangeVersion, low, high in self.virtualNetwork
+        ):
+            return True
+        return None if self.unresolved else False
+
+
+@dataclass
+class CompiledRule:
+    name: str
+    priority: int
+    access: str
+    protocol: str
+    sources: AddressSet
+    destinations: AddressSet
+    sourcePorts: list[tuple[int, int]]
+    destinationPorts: list[tuple[int, int]]
+
+    @classmethod
+    def compile(cls, rule: dict, tags: TagContext) -> "CompiledRule":
+        properties = rule.get("properties", {})
+        return cls(
+            name=rule.get("name"),
+            priority=properties.get("priority", 0),
+            access=properties.get("access", "Deny"),
+            protocol=(properties.get("protocol") or "*").lower(),
+            sources=AddressSet.compile(properties.get("sourceAddressPrefix"), properties.get("sourceAddressPrefixes"), properties.get("sourceApplicationSecurityGroups"), tags),
+            destinations=AddressSet.compile(properties.get("destinationAddressPrefix"), properties.get("destinationAddressPrefixes"), properties.get("destinationApplicationSecurityGroups"), tags),
+            sourcePorts=_port_ranges(properties.get("sourcePortRange"), properties.get("sourcePortRanges")),
+            destinationPorts=_port_ranges(properties.get("destinationPortRange"), properties.get("destinationPortRanges")),
+        )
+
+
+class RuleTable:
+    """
+    Rules of one direction in priority order, indexed by destination port.
+    Each elementary port interval keeps the priority ordered rules covering it,
+    so a query only scans rules that can match its port.
+    """
+
+    def __init__(self, rules: list[CompiledRule]):
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+        points = {0}
+        for rule in self.rules:
+            for low, high in rule.destinationPorts:
+                points.add(low)
+                points.add(high + 1)
+        self._boundaries = sorted(point for point in points if point <= MAX_PORT)
+        self._buckets: list[list[CompiledRule]] = [[] for _ in self._boundaries]
+        for rule in self.rules:
+            for low, high in rule.destinationPorts:
+                start = bisect.bisect_right(self._boundaries, low) - 1
+                end = bisect.bisect_right(self._boundaries, high) - 1
+                for bucket in self._buckets[start:end + 1]:
+                    bucket.append(rule)
+
+    def candidates(self, port: int | None) -> list[CompiledRule]:
+        if port is None:
+            return self.rules
+        return self._buckets[bisect.bisect_right(self._boundaries, port) - 1]
+
+    def evaluate(self, protocol: str, source, sourcePort: int | None, destination, destinationPort: int | None) -> dict:
+        """
+        The first rule in priority order matching the flow. Rules that only might match, because
+        a tag is unresolved or a tcp or udp flow has no port to check against a port range,
+        are skipped and make the verdict indeterminate.
+        """
+        skipped = []
+        for rule in self.candidates(destinationPort):
+            if rule.protocol != "*" and rule.protocol != protocol:
+                continue
+            if sourcePort is not None and not any(low <= sourcePort <= high for low, high in rule.sourcePorts):
+                continue
+            sourceMatch, destinationMatch = rule.sources.match(source), rule.destinations.match(destination)
+            if sourceMatch is False or destinationMatch is False:
+                continue
+            unresolved = rule.sources.unresolved + rule.destinations.unresolved if sourceMatch is None or destinationMatch is None else []
+            if protocol in PORT_PROTOCOLS:
+                if sourcePort is None and rule.sourcePorts != ANY_PORT:
+                    unresolved.append("sourcePort")
+                if destinationPort is None and rule.destinationPorts != ANY_PORT:
+                    unresolved.append("destinationPort")
+            if unresolved:
+                skipped.append({"rule": rule.name, "priority": rule.priority, "unresolved": unresolved})
+                continue
+            return {"access": rule.access, "rule": rule.name, "priority": rule.priority, "indeterminate": bool(skipped), "unresolvedRules": skipped}
+        return {"access": "Deny", "rule": None, "priority": None, "indeterminate": bool(skipped), "unresolvedRules": skipped}
+
+
+class CompiledNsg:
+    def __init__(self, profile: dict, tags: TagContext):
+        self.id = profile.get("id")
+        properties = profile.get("properties", {})
+        rules = {"inbound": [], "outbound": []}
+        for rule in (properties.get("securityRules") or []) + (properties.get("defaultSecurityRules") or []):
+            direction = (rule.get("properties", {}).get("direction") or "").lower()
+            if direction in rules:
+                rules[direction].append(CompiledRule.compile(rule, tags))
+        self.tables = {direction: RuleTable(compiled) for direction, compiled in rules.items()}
+
+
+class PrefixTrie:
+    """Binary trie over address bits answering longest prefix match."""
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+
+    def insert(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network, value) -> None:
+        node, address, width = self._roots[network.version], int(network.network_address), network.max_prefixlen
+        for bit in range(network.prefixlen):
+            branch = (address >> (width - 1 - bit)) & 1
+            if node[branch] is None:
+                node[branch] = [None, None, None]
+            node = node[branch]
+        node[2] = value
+
+    def lookup(self, address: ipaddress.IPv4Address | ipaddress.IPv6Address):
+        node, value, width = self._roots[address.version], None, address.max_prefixlen
+        number = int(address)
+        for bit in range(width):
+            if node[2] is not None:
+                value = node[2]
+            node = node[(number >> (width - 1 - bit)) & 1]
+            if node is None:
+                return value
+        return node[2] if node[2] is not None else value
+
+
+class CompiledRouteTable:
+    def __init__(self, profile: dict | None, tags: TagContext, vnetAddressPrefixes: list[str]):
+        self.id = profile.get("id") if profile else None
+        self.trie = PrefixTrie()
+        self.unresolved = []
+        # System routes first, user routes with the same prefix override them.
+        for prefix in SYSTEM_NONE_ROUTE_PREFIXES:
+            self.trie.insert(ipaddress.ip_network(prefix), {"prefix": prefix, "nextHopType": "None", "source": "Default"})
+        self.trie.insert(ipaddress.ip_network("0.0.0.0/0"), {"prefix": "0.0.0.0/0", "nextHopType": "Internet", "source": "Default"})
+        for prefix in vnetAddressPrefixes:
+            self.trie.insert(ipaddress.ip_network(prefix, strict=False), {"prefix": prefix, "nextHopType": "VnetLocal", "source": "Default"})
+        for route in (profile or {}).get("properties", {}).get("routes") or []:
+            properties = route.get("properties", {})
+            prefix = properties.get("addressPrefix") or ""
+            value = {
+                "prefix": prefix,
+                "route": route.get("name"),
+                "nextHopType": properties.get("nextHopType"),
+                "nextHopIpAddress": properties.get("nextHopIpAddress"),
+                "source": "User",
+            }
+            if _is_prefix(prefix):
+                self.trie.insert(ipaddress.ip_network(prefix, strict=False), value)
+            elif prefix.lower() in tags.serviceTags:
+                for version, low, high in tags.serviceTags[prefix.lower()]:
+                    address = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+                    for network in ipaddress.summarize_address_range(address(low), address(high)):
+                        self.trie.insert(network, value)
+            else:
+                self.unresolved.append(route.get("name"))
+
+    def lookup(self, destination) -> dict | None:
+        return self.trie.lookup(destination)
+
+
+async def vnet_address_prefixes(ctx: Context, profiles: list[dict | None]) -> list[str]:
+    """
+    Address space of the virtual networks, and of their peerings, of the subnets the given
+    route table and network security groups are attached to.
+    """
+    vnetIds = {}
+    for profile in profiles:
+        for subnet in (profile or {}).get("properties", {}).get("subnets") or []:
+            subnetId = subnet.get("id") or ""
+            if "/subnets/" in subnetId:
+                vnetId = subnetId.rsplit("/subnets/", 1)[0]
+                vnetIds.setdefault(vnetId.lower(), vnetId)
+    prefixes = set()
+    for vnet in await asyncio.gather(*[fetch_profile(ctx, vnetId) for vnetId in vnetIds.values()], return_exceptions=True):
+        if isinstance(vnet, Exception):
+            continue
+        properties = vnet.get("properties", {})
+        prefixes.update((properties.get("addressSpace") or {}).get("addressPrefixes") or [])
+        for peering in properties.get("virtualNetworkPeerings") or []:
+            prefixes.update(((peering.get("properties") or {}).get("remoteAddressSpace") or {}).get("addressPrefixes") or [])
+    return sorted(prefixes)
+
+
+_compiled: OrderedDict[tuple, object] = OrderedDict()
+
+
+def compiled(kind: type, profile: dict | None, tagKey: str, *args):
+    """Compiled form of a profile, cached per resource id, etag and tag context."""
+    key = (kind.__name__, (profile or {}).get("id", "").lower(), (profile or {}).get("etag"), tagKey)
+    value = _compiled.get(key)
+    if value is None:
+        value = _compiled[key] = kind(profile, *args)
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    _compiled.move_to_end(key)
+    return value
+
+
+class FlowQuery(BaseModel):
+    source: str = Field(description="The source ip address.")
+    destination: str = Field(description="The destination ip address.")
+    destinationPort: int | None = Field(default=None, ge=0, le=MAX_PORT, description="The destination port. Leave empty for protocols without ports; Tcp and Udp flows without it are indeterminate for rules limited to some ports.")
+    sourcePort: int | None = Field(default=None, ge=0, le=MAX_PORT, description="The source port. Tcp and Udp flows without it are indeterminate for rules limited to some source ports.")
+    protocol: str = Field(default="Tcp", description="Tcp, Udp, Icmp, Esp or Ah.")
+
+
+@server.tool(
+    name="Evaluate-Azure-Network-Reachability",
+    description="Evaluate whether network flows are allowed by azure network security groups and where route tables send them, without reasoning over raw rules. "
+    "Put the network security groups on the source side (evaluated as outbound), the ones on the destination side (evaluated as inbound), the route table of the source subnet "
+    "and a list of flows with source ip, destination ip, destination port and protocol. "
+    "Service tags other than VirtualNetwork, Internet and AzureLoadBalancer, and application security groups, are only resolved when their address prefixes are provided. "
+    "Without vnetAddressPrefixes the address space of the virtual networks the route table and network security groups are attached to is used; "
+    "when it is still unknown, flows to private addresses that only match the default None route are reported as indeterminate. "
+    "It returns, per flow, the deciding rule of each network security group, the longest prefix match route and whether the flow is allowed.",
+)
+async def evaluate_azure_network_reachability(
+    ctx: Context,
+    flows: list[FlowQuery] = Field(description="The flows to evaluate."),
+    sourceNetworkSecurityGroupIds: list[str] = Field(default_factory=list, description="Resource ids of the network security groups on the source nic or subnet."),
+    destinationNetworkSecurityGroupIds: list[str] = Field(default_factory=list, description="Resource ids of the network security groups on the destination nic or subnet."),
+    routeTableId: str | None = Field(default=None, description="Resource id of the route table of the source subnet."),
+    vnetAddressPrefixes: list[str] = Field(default_factory=list, description="Address prefixes of the virtual network and its peerings, used for the VirtualNetwork tag and VnetLocal routes. Looked up from the attached subnets when empty."),
+    serviceTags: dict[str, list[str]] = Field(default_factory=dict, description="Address prefixes of service tags used by the rules, keyed by tag name."),
+    applicationSecurityGroups: dict[str, list[str]] = Field(default_factory=dict, description="Member ip addresses of application security groups used by the rules, keyed by resource id."),
+) -> dict:
+    """
+    Azure network reachability evaluation.
+    Args:
+            flows (list[FlowQuery]): The flows to evaluate.
+            sourceNetworkSecurityGroupIds (list[str]): Network security groups evaluated as outbound.
+            destinationNetworkSecurityGroupIds (list[str]): Network security groups evaluated as inbound.
+            routeTableId (str): Route table of the source subnet.
+            vnetAddressPrefixes (list[str]): Address prefixes of the virtual network.
+            serviceTags (dict): Address prefixes of service tags.
+            applicationSecurityGroups (dict): Member ip addresses of application security groups.
+    Returns:
+            dict: The verdict of every flow in JSON format.
+    """
+    nsgIds = sourceNetworkSecurityGroupIds + destinationNetworkSecurityGroupIds
+    profiles = await asyncio.gather(*[fetch_profile(ctx, resourceId) for resourceId in nsgIds + ([routeTableId] if routeTableId else [])])
+    if not vnetAddressPrefixes:
+        vnetAddressPrefixes = await vnet_address_prefixes(ctx, profiles)
+    tagKey = json.dumps([vnetAddressPrefixes, serviceTags, applicationSecurityGroups], sort_keys=True)
+    tags = TagContext.build(vnetAddressPrefixes, serviceTags, applicationSecurityGroups)
+    nsgs = [compiled(CompiledNsg, profile, tagKey, tags) for profile in profiles[:len(nsgIds)]]
+    outbound, inbound = nsgs[:len(sourceNetworkSecurityGroupIds)], nsgs[len(sourceNetworkSecurityGroupIds):]
+    routes = compiled(CompiledRouteTable, profiles[-1] if routeTableId else None, tagKey, tags, vnetAddressPrefixes)
+
+    start = time.perf_counter()
+    results = []
+    for flow in flows:
+        source, destination = ipaddress.ip_address(flow.source), ipaddress.ip_address(flow.destination)
+        protocol = flow.protocol.lower()
+        verdicts = {
+            "outbound": [{"networkSecurityGroup": nsg.id, **nsg.tables["outbound"].evaluate(protocol, source, flow.sourcePort, destination, flow.destinationPort)} for nsg in outbound],
+            "inbound": [{"networkSecurityGroup": nsg.id, **nsg.tables["inbound"].evaluate(protocol, source, flow.sourcePort, destination, flow.destinationPort)} for nsg in inbound],
+        }
+        route = routes.lookup(destination)
+        if route is not None and route["source"] == "Default" and route["nextHopType"] == "None" and not vnetAddressPrefixes:
+            # The destination may well be in the unknown virtual network address space.
+            route = {**route, "indeterminate": True}
+        results.append({
+            "flow": flow.model_dump(),
+            **verdicts,
+            "route": route,
+            "allowed": all(verdict["access"] == "Allow" for verdict in verdicts["outbound"] + verdicts["inbound"]) and (route or {}).get("nextHopType") != "None",
+            "indeterminate": any(verdict["indeterminate"] for verdict in verdicts["outbound"] + verdicts["inbound"]) or bool((route or {}).get("indeterminate")),
+        })
+    return {
+        "results": results,
+        "vnetAddressPrefixes": vnetAddressPrefixes,
+        "unresolvedRoutes": routes.unresolved,
+        "evaluationMicroseconds": round((time.perf_counter() - start) * 1e6, 1),
+    }
@@ -1,21 +1,49 @@
-from context import app_lifespan
+from server import server
 
+from urllib.parse import parse_qs, quote, urlencode, urlparse
 from pydantic import Field
-from mcp.server.fastmcp import Context, FastMCP
-from azure.mgmt.resource.resources.aio import ResourceManagementClient
+from apiversions import apiVersions
+from cache import BypassCache, conditional_headers, resource_type
+from projection import Fields, JmesPath, Summary, project
+from rawjson import get_raw
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import parse_resource_id, resource_id
 
 # Constants
+RESOURCE_CLIENT = "azure.mgmt.resource.resources.aio:ResourceManagementClient"
+RESOURCE_API_VERSION = "2024-03-01"
 USER_AGENT = "azure-resource-mcp-server/1.0"
+LIST_MAX_ITEMS = 1000
+# Logger name of the log notifications carrying streamed resources.
+LIST_ROWS_LOGGER = "azure-resource-list"
+
+
+def _skip_token(nextLink: str | None) -> str | None:
+    """The $skiptoken of an ARM nextLink, returned to callers instead of the link itself."""
+    if not nextLink:
+        return None
+    values = parse_qs(urlparse(nextLink).query).get("$skiptoken")
+    if not values:
+        raise ValueError("The next page link returned by azure rest api has no $skiptoken.")
+    return values[0]
+
+
+def _quote(value: str) -> str:
+    """OData string literal of a $filter value."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _next_link(client, subscriptionId: str, resourceGroupName: str, filter: str | None, expand: str | None, top: int | None, skipToken: str) -> str:
+    """
+    Rebuild the nextLink of a resource group listing on the ARM endpoint of the client,
+    so a continuation token can never send the request and its bearer token to another host.
+    """
+    query = {"$filter": filter, "$expand": expand, "$top": top, "$skiptoken": skipToken}
+    path = f"/subscriptions/{quote(subscriptionId, safe='')}/resourceGroups/{quote(resourceGroupName, safe='')}/resources"
+    return f"{client._client._base_url.rstrip('/')}{path}?{urlencode({key: value for key, value in query.items() if value is not None})}"
 
-# Initialize FastMCP server
-resourceGroup = FastMCP(
-    "Azure resource group MCP server",
-    "This mcp server will operate on Azure resource group.Put subscriptionid, and resource group name and get the list of azure resources.",
-    dependencies=["azure-mgmt-resource", "azure-identity", "aiohttp"],
-    lifespan=app_lifespan,
-)
 
-@resourceGroup.tool(
+@server.tool(
     name="Get-Azure-resource-Profile",
     description="Get Azure resource group profile in JSON format from azure rest api."
     "SubscriptionId, resourceGroupName are required parameters. "
@@ -26,57 +54,197 @@ async def get_azure_resource_group(
     ctx: Context,
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
 ) -> bytes:
     """
     Azure resource group profile.
     Args:
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
     Returns:
             str: The resource group profile in JSON format.
     """
-    rg = None
-    async with ResourceManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
-        user_agent=USER_AGENT,
-    ) as client:
-        rg = await client.resource_groups.get(
-            resource_group_name=resourceGroupName,
+    app = ctx.request_context.lifespan_context
+    resourceId = resource_id(subscription=subscriptionId, resource_group=resourceGroupName)
+
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            RESOURCE_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            if app.rawJson:
+                return await get_raw(client, resourceId, RESOURCE_API_VERSION, etag)
+            return await client.resource_groups.get(
+                resource_group_name=resourceGroupName,
+                headers=conditional_headers(etag),
+            )
+
+    profile = await app.cache.get(resourceId, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
+
+
+@server.tool(
+    name="Get-Azure-Resource-ById",
+    description="Get the profile of any Azure resource in JSON format from azure rest api by its resource id. "
+    "Use it for resource types without a dedicated tool, e.g. public ip addresses, network interfaces, virtual machine scale sets, disks or private endpoints. "
+    "The resource id is in the format of /subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/{namespace}/{type}/{name}. "
+    "The api-version is looked up from the resource provider registration unless apiVersion is set. "
+    "The profile spec can be found here: https://learn.microsoft.com/en-us/rest/api/resources/resources/get-by-id",
+)
+async def get_azure_resource_by_id(
+    ctx: Context,
+    resourceId: str = Field(description="The Azure resource id."),
+    apiVersion: str | None = Field(default=None, description="The api-version to use instead of the latest one registered for the resource type."),
+    bypassCache: BypassCache = False,
+    fields: Fields = None,
+    jmesPath: JmesPath = None,
+    summary: Summary = False,
+) -> dict:
+    """
+    Azure resource profile by resource id.
+    Args:
+            resourceId (str): The Azure resource id.
+            apiVersion (str): The api-version to use.
+            bypassCache (bool): Skip the response cache.
+            fields (list[str]): Dotted paths of the profile to return.
+            jmesPath (str): JMESPath expression applied to the profile.
+            summary (bool): Drop null and empty fields.
+    Returns:
+            dict: The resource profile in JSON format.
+    """
+    app = ctx.request_context.lifespan_context
+    subscriptionId = parse_resource_id(resourceId).get("subscription")
+    if not subscriptionId:
+        raise ValueError(
+            f"Invalid resource id {resourceId}, expected "
+            "/subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/{namespace}/{type}/{name}."
         )
-        await client.close()
-    return rg.serialize(keep_readonly=True)
 
+    async def fetch(etag: str | None):
+        async with app.clients.client(
+            RESOURCE_CLIENT,
+            subscriptionId,
+            user_agent=USER_AGENT,
+        ) as client:
+            version = apiVersion
+            if version is None:
+                resourceType = resource_type(resourceId)
+                if resourceType.startswith("microsoft.resources/"):
+                    version = RESOURCE_API_VERSION
+                else:
+                    version = await apiVersions.get(client, resourceType)
+            if app.rawJson:
+                return await get_raw(client, resourceId, version, etag)
+            return await client.resources.get_by_id(
+                resource_id=resourceId,
+                api_version=version,
+                headers=conditional_headers(etag),
+            )
+
+    # Profiles of an explicit api-version are cached apart from the ones the typed getters share.
+    cacheKey = resourceId if apiVersion is None else f"{resourceId}@{apiVersion}"
+    profile = await app.cache.get(cacheKey, fetch, bypass=bypassCache)
+    return project(profile, fields, jmesPath, summary)
 
-@resourceGroup.tool(
+
+@server.tool(
     name="List-Azure-resource-in-resourceGroup",
     description="List Azure resource in resource group"
     "SubscriptionId, resourceGroupName are required parameters. "
+    "Resources can be filtered on the server by resourceType, tagName and tagValue or any other azure rest api $filter expression. "
+    "A tagName filter, with or without tagValue, cannot be combined with resourceType or filter. "
+    "Results are paged: pages are fetched until maxItems resources are collected, and the returned continuationToken can be sent back to fetch the next resources. "
+    "With streamRows the resources of every page are sent as they arrive in log notifications of the azure-resource-list logger, "
+    "with data {offset, rows}, and the result only carries the count and continuationToken. "
     "It returns the azure resource profile in JSON format. "
-    "The profile spec can be found here: https://learn.microsoft.com/en-us/rest/api/resources/resources/list",
+    "The profile spec can be found here: https://learn.microsoft.com/en-us/rest/api/resources/resources/list-by-resource-group",
 )
-async def get_azure_resource_group(
+async def list_azure_resources_in_resource_group(
     ctx: Context,
     subscriptionId: str = Field(description="The Azure subscription ID."),
     resourceGroupName: str = Field(description="The Azure resource group name."),
-) -> list[bytes]:
+    resourceType: str | None = Field(default=None, description="Only list resources of this type, e.g. Microsoft.Network/networkInterfaces."),
+    tagName: str | None = Field(default=None, description="Only list resources with this tag."),
+    tagValue: str | None = Field(default=None, description="Only list resources whose tagName tag has this value."),
+    filter: str | None = Field(default=None, description="Additional azure rest api $filter expression, e.g. location eq 'eastus'."),
+    expand: str | None = Field(default=None, description="Comma separated additional properties to include, e.g. createdTime,changedTime,provisioningState."),
+    top: int | None = Field(default=None, ge=1, le=1000, description="The number of resources per page."),
+    maxItems: int = Field(default=LIST_MAX_ITEMS, ge=1, description="Stop fetching pages once this many resources are collected."),
+    continuationToken: str | None = Field(default=None, description="The continuationToken returned by a previous call with the same filters to fetch the next resources."),
+    streamRows: bool = Field(default=False, description="Send the resources of every page in log notifications as they arrive instead of returning them at the end."),
+) -> dict:
     """
-    Azure resource group profile.
+    Azure resources in resource group.
     Args:
             subscriptionId (str): The Azure subscription ID.
             resourceGroupName (str): The Azure resource group name.
+            resourceType (str): Only list resources of this type.
+            tagName (str): Only list resources with this tag.
+            tagValue (str): Only list resources whose tag has this value.
+            filter (str): Additional $filter expression.
+            expand (str): Additional properties to include.
+            top (int): The number of resources per page.
+            maxItems (int): Stop fetching pages once this many resources are collected.
+            continuationToken (str): The continuationToken returned by a previous call.
+            streamRows (bool): Send the resources in log notifications as they arrive.
     Returns:
-            str: The resource list in JSON format.
+            dict: The resource list in JSON format and the continuationToken of the next page if any.
     """
-    resources = []
-    async with ResourceManagementClient(
-        credential=ctx.request_context.lifespan_context.credential,
-        subscription_id=subscriptionId,
+    if tagValue and not tagName:
+        raise ValueError("tagValue can only be used together with tagName.")
+    # Azure rest api rejects tag filters combined with any other filter.
+    if tagName and (resourceType or filter):
+        raise ValueError("tagName and tagValue cannot be combined with resourceType or filter, list by tag alone and filter the result instead.")
+    filters = []
+    if resourceType:
+        filters.append(f"resourceType eq {_quote(resourceType)}")
+    if tagName:
+        filters.append(f"tagName eq {_quote(tagName)}")
+        if tagValue:
+            filters.append(f"tagValue eq {_quote(tagValue)}")
+    if filter:
+        filters.append(filter)
+
+    filter = " and ".join(filters) or None
+    resources, count = [], 0
+    async with ctx.request_context.lifespan_context.clients.client(
+        RESOURCE_CLIENT,
+        subscriptionId,
         user_agent=USER_AGENT,
     ) as client:
-        async for i in client.resources.list_by_resource_group(
+        pages = client.resources.list_by_resource_group(
             resource_group_name=resourceGroupName,
-        ):
-            resources.append(i.serialize(keep_readonly=True)) 
-        await client.close()
-    return resources
+            filter=filter,
+            expand=expand,
+            top=top,
+        ).by_page(
+            continuation_token=_next_link(client, subscriptionId, resourceGroupName, filter, expand, top, continuationToken) if continuationToken else None,
+        )
+        async for page in pages:
+            rows = [i.serialize(keep_readonly=True) async for i in page]
+            if streamRows:
+                if rows:
+                    await ctx.session.send_log_message(level="info", data={"offset": count, "rows": rows}, logger=LIST_ROWS_LOGGER)
+            else:
+                resources.extend(rows)
+            count += len(rows)
+            await ctx.report_progress(count)
+            if count >= maxItems:
+                break
+        continuationToken = _skip_token(pages.continuation_token)
+    response = {
+        "value": resources,
+        "count": count,
+        "continuationToken": continuationToken,
+    }
+    if streamRows:
+        response["streamed"] = True
+    return response
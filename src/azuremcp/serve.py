@@ -0,0 +1,88 @@
+"""
+HTTP serving mode of the MCP server.
+
+It runs several uvicorn worker processes serving stateless streamable HTTP at
+/mcp. Every worker keeps one warm context shared by all of its sessions and
+serializes profiles on a thread pool. Workers share cached profiles through the
+state backend, a SQLite file in a per user directory by default. With
+--share-tokens they also share access tokens, as long as only the current user
+can read the store.
+
+    python src/azuremcp/serve.py --host 0.0.0.0 --port 8000 --workers 4
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent
+
+# Constants
+DEFAULT_PORT = 8000
+DEFAULT_SERIALIZE_THREADS = 4
+# Created with mode 0700, the store can hold access tokens.
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"), "azure-mcp", "state.db")
+
+
+def create_app():
+    """Starlette app of one worker process, with the tools registered and one shared context."""
+    sys.path.insert(0, str(SERVER_DIR))
+    spec = importlib.util.spec_from_file_location("azuremcp", SERVER_DIR / "__init__.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    from context import process_context
+
+    server = module.server
+    # Requests of one session can reach any worker, so no session state is kept between them.
+    server.settings.stateless_http = True
+    app = server.streamable_http_app()
+
+    lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def worker_lifespan(app):
+        async with process_context():
+            async with lifespan(app):
+                yield
+
+    app.router.lifespan_context = worker_lifespan
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument("--serialize-threads", type=int, default=DEFAULT_SERIALIZE_THREADS, help="Serialization threads per worker, 0 serializes on the event loop.")
+    parser.add_argument("--snapshot-path", default=os.environ.get("AZURE_MCP_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH), help="Location of the state shared by the workers.")
+    parser.add_argument("--share-tokens", action="store_true", help="Share access tokens between the workers through the state store instead of acquiring them per worker.")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # Read by the server modules when the workers import them.
+    os.environ["AZURE_MCP_SERIALIZE_THREADS"] = str(args.serialize_threads)
+    os.environ["AZURE_MCP_SNAPSHOT_PATH"] = args.snapshot_path
+    if args.share_tokens:
+        os.environ["AZURE_MCP_SHARE_TOKENS"] = "1"
+
+    import uvicorn
+
+    uvicorn.run(
+        "serve:create_app",
+        factory=True,
+        app_dir=str(SERVER_DIR),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,82 @@
+from context import app_lifespan
+from metrics import metrics
+
+from mcp.server.fastmcp import Context, FastMCP
+
+
+class InstrumentedFastMCP(FastMCP):
+    """FastMCP server recording the latency, calls and errors of every registered tool."""
+
+    def add_tool(self, fn, name: str | None = None, **kwargs) -> None:
+        super().add_tool(metrics.instrument(fn, name or fn.__name__), name=name, **kwargs)
+
+
+# Initialize FastMCP server
+server = InstrumentedFastMCP(
+    "Azure resource rest api MCP server",
+    "This mcp server will fetch azure resource profiles in json format from azure rest api and azure resource graph. "
+    "SubscriptionId, resourceGroupName and resource name can be parsed from the azure resource id, "
+    "which is in the format of /subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/{namespace}/{type}/{name}.",
+    dependencies=[
+        "azure-mgmt-containerservice",
+        "azure-mgmt-network",
+        "azure-mgmt-resource",
+        "azure-mgmt-resourcegraph",
+        "azure-identity",
+        "aiohttp",
+    ],
+    lifespan=app_lifespan,
+)
+
+
+# Process diagnostics.
+@server.resource(
+    "metrics://prometheus",
+    name="Prometheus metrics",
+    description="Latency histograms per tool and phase, upstream request, 429, byte and cache counters in Prometheus text format.",
+    mime_type="text/plain",
+)
+def prometheus_metrics() -> str:
+    return metrics.prometheus()
+
+
+@server.tool(
+    name="Get-Azure-Credential-Status",
+    description="Get the status of the azure credential used by the azure resource profile tools. "
+    "It returns the DefaultAzureCredential chain link that acquired the token, the remaining lifetime of the cached tokens and the last acquisition error in JSON format.",
+)
+async def get_credential_status(ctx: Context) -> dict:
+    """
+    Azure credential status.
+    Returns:
+            dict: The credential source, cached tokens and last error in JSON format.
+    """
+    return ctx.request_context.lifespan_context.credential.status()
+
+
+@server.tool(
+    name="Get-Azure-Response-Cache-Stats",
+    description="Get statistics of the in-process response cache used by the azure resource profile tools. "
+    "It returns the number of cached profiles and the hit, miss, revalidation and eviction counters in JSON format.",
+)
+async def get_response_cache_stats(ctx: Context) -> dict:
+    """
+    Response cache statistics.
+    Returns:
+            dict: The cache counters in JSON format.
+    """
+    return ctx.request_context.lifespan_context.cache.stats()
+
+
+@server.tool(
+    name="Get-Azure-Throttling-Stats",
+    description="Get statistics of the azure rest api rate limiter shared by the azure resource profile tools. "
+    "It returns the number of queued requests, wait times and, per subscription and for resource graph, the remaining read quota reported by azure, the number of 429 responses and how long requests are blocked, in JSON format.",
+)
+async def get_throttling_stats(ctx: Context) -> dict:
+    """
+    Azure rest api rate limiter statistics.
+    Returns:
+            dict: The queue depth, wait times and per subscription quota in JSON format.
+    """
+    return ctx.request_context.lifespan_context.throttle.stats()
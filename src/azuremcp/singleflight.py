@@ -0,0 +1,67 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager, suppress
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one upstream call.
+    Callers arriving while a call is in flight wait for and share its result.
+    The shared call reports progress to a sink fanning it out to the callers
+    listening to its key, so it never holds on to the context of one caller.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._listeners: dict[Hashable, list[Callable[[float, float | None], Awaitable]]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        Run fn once for all concurrent callers with the same key.
+        A caller being cancelled does not cancel the shared call.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even when every caller was cancelled.
+            task.exception()
+
+    @asynccontextmanager
+    async def listen(self, key: Hashable, listener: Callable[[float, float | None], Awaitable]):
+        """Forward the progress of the call with this key to listener until the block exits."""
+        listeners = self._listeners.setdefault(key, [])
+        listeners.append(listener)
+        try:
+            yield
+        finally:
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[key]
+
+    def progress(self, key: Hashable) -> Callable[[float, float | None], Awaitable[None]]:
+        """Progress sink of the call with this key, a no-op once nobody listens to it."""
+
+        async def report(progress: float, total: float | None = None) -> None:
+            for listener in list(self._listeners.get(key, ())):
+                # A caller whose session went away must not fail the shared call.
+                with suppress(Exception):
+                    await listener(progress, total)
+
+        return report
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
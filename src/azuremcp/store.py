@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+# Constants
+SNAPSHOT_PATH = os.environ.get("AZURE_MCP_SNAPSHOT_PATH")
+SNAPSHOT_FRESHNESS = float(os.environ.get("AZURE_MCP_SNAPSHOT_FRESHNESS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Snapshot:
+    profile: dict
+    etag: str | None
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class SnapshotStore:
+    """
+    SQLite store of serialized profiles and resource graph results.
+    It outlives the process, so a new stdio session can answer from disk within
+    the freshness window and revalidate in the background, and HTTP worker
+    processes share warm profiles and tokens through it. A class with the same
+    methods can replace it as the shared state backend.
+    """
+
+    def __init__(self, path: str, freshness: float = SNAPSHOT_FRESHNESS):
+        self.path = path
+        self.freshness = freshness
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._background: set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale = 0
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Only the owner can read the store: it can hold access tokens shared between server processes.
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets concurrent server processes read while one of them writes.
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "key TEXT PRIMARY KEY, profile TEXT NOT NULL, etag TEXT, fetched_at REAL NOT NULL)"
+        )
+        connection.commit()
+        self._connection = connection
+
+    def _get(self, key: str) -> Snapshot | None:
+        with self._lock:
+            row = self._connection.execute("SELECT profile, etag, fetched_at FROM snapshots WHERE key = ?", (key,)).fetchone()
+        return Snapshot(profile=json.loads(row[0]), etag=row[1], fetched_at=row[2]) if row else None
+
+    def _put(self, key: str, profile: str, etag: str | None, fetchedAt: float) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO snapshots (key, profile, etag, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, profile, etag, fetchedAt),
+            )
+            self._connection.commit()
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+            self._connection.commit()
+
+    async def open(self) -> None:
+        await asyncio.to_thread(self._open)
+
+    async def get(self, key: str) -> Snapshot | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, profile, etag: str | None = None) -> None:
+        await asyncio.to_thread(self._put, key, json.dumps(profile), etag, time.time())
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    def private(self) -> bool:
+        """Whether the store and its directory belong to the current user and nobody else can read them."""
+        if os.name != "posix":
+            return True
+        for path in (self.path, os.path.dirname(os.path.abspath(self.path))):
+            info = os.stat(path)
+            if info.st_uid != os.getuid() or info.st_mode & 0o077:
+                return False
+        return True
+
+    def fresh(self, snapshot: Snapshot | None) -> bool:
+        return snapshot is not None and snapshot.age < self.freshness
+
+    def revalidate(self, fetch: Callable[[], Awaitable]) -> None:
+        """Run fetch in the background, logging instead of raising failures."""
+
+        async def run():
+            try:
+                await fetch()
+            except Exception as e:
+                logger.warning("Background revalidation failed: %s: %s", type(e).__name__, e)
+
+        task = asyncio.create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable], bypass: bool = False):
+        """
+        Answer from a fresh snapshot and refresh it in the background, otherwise fetch and store.
+        Args:
+                key (str): The snapshot key.
+                fetch (Callable): Coroutine function returning a JSON serializable result.
+                bypass (bool): Ignore the snapshot and always fetch.
+        """
+
+        async def fetch_and_store():
+            result = await fetch()
+            await self.put(key, result)
+            return result
+
+        if not bypass:
+            snapshot = await self.get(key)
+            if self.fresh(snapshot):
+                self.hits += 1
+                self.revalidate(fetch_and_store)
+                return snapshot.profile
+        return await fetch_and_store()
+
+    def stats(self) -> dict:
+        return {"path": self.path, "freshnessSeconds": self.freshness, "hits": self.hits, "stale": self.stale}
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        if self._connection is not None:
+            await asyncio.to_thread(self._connection.close)
+            self._connection = None
@@ -0,0 +1,175 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from azure.core.pipeline import PipelineRequest, PipelineResponse
+from azure.core.pipeline.policies import AsyncHTTPPolicy
+
+# Constants
+# ARM refills the read bucket of a subscription at 25 requests per second up to 250.
+THROTTLE_BUCKET_CAPACITY = 250.0
+THROTTLE_REFILL_RATE = 25.0
+# Requests are queued instead of sent when ARM reports fewer remaining reads than this.
+THROTTLE_LOW_QUOTA = 25
+THROTTLE_DEFAULT_RETRY_AFTER = 10.0
+REMAINING_READS_HEADERS = (
+    "x-ms-ratelimit-remaining-subscription-reads",
+    "x-ms-ratelimit-remaining-subscription-global-reads",
+)
+# Resource graph allows 15 queries per user every 5 seconds, independent of the ARM read quota.
+GRAPH_BUCKET = "resourcegraph"
+GRAPH_BUCKET_CAPACITY = 15.0
+GRAPH_REFILL_RATE = 3.0
+GRAPH_LOW_QUOTA = 1
+GRAPH_REMAINING_HEADER = "x-ms-user-quota-remaining"
+GRAPH_RESETS_AFTER_HEADER = "x-ms-user-quota-resets-after"
+
+SUBSCRIPTION_PATTERN = re.compile(r"/subscriptions/([^/?]+)", re.IGNORECASE)
+GRAPH_PATTERN = re.compile(r"/providers/microsoft\.resourcegraph/", re.IGNORECASE)
+
+
+def _resets_after(value: str | None) -> float | None:
+    """Seconds of a resource graph quota reset time, e.g. 00:00:03."""
+    try:
+        hours, minutes, seconds = value.split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class SubscriptionBucket:
+    tokens: float
+    capacity: float
+    refill_rate: float
+    low_quota: int
+    updated: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    remaining: int | None = None
+    throttled: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ArmThrottle:
+    """
+    Per subscription token bucket shared by every client of the process.
+    Remaining quota from ARM response headers drains the bucket early, and a
+    429 Retry-After blocks the whole subscription rather than the failing call.
+    Resource graph queries have a bucket of their own sized to the resource graph
+    quota, blocked until the quota resets once it is used up.
+    """
+
+    def __init__(self, capacity: float = THROTTLE_BUCKET_CAPACITY, refill_rate: float = THROTTLE_REFILL_RATE, low_quota: int = THROTTLE_LOW_QUOTA):
+        self._capacity = capacity
+        self._refill_rate = refill_rate
+        self._low_quota = low_quota
+        self._buckets: dict[str, SubscriptionBucket] = {}
+        self.queued = 0
+        self.requests = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _bucket(self, subscription: str) -> SubscriptionBucket:
+        bucket = self._buckets.get(subscription)
+        if bucket is None:
+            if subscription == GRAPH_BUCKET:
+                bucket = SubscriptionBucket(tokens=GRAPH_BUCKET_CAPACITY, capacity=GRAPH_BUCKET_CAPACITY, refill_rate=GRAPH_REFILL_RATE, low_quota=GRAPH_LOW_QUOTA)
+            else:
+                bucket = SubscriptionBucket(tokens=self._capacity, capacity=self._capacity, refill_rate=self._refill_rate, low_quota=self._low_quota)
+            self._buckets[subscription] = bucket
+        return bucket
+
+    def _refill(self, bucket: SubscriptionBucket, now: float) -> None:
+        bucket.tokens = min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.refill_rate)
+        bucket.updated = now
+
+    async def acquire(self, subscription: str) -> None:
+        """Wait until the subscription has quota for one more request."""
+        bucket = self._bucket(subscription)
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            # The lock keeps waiting requests in FIFO order.
+            async with bucket.lock:
+                while True:
+                    now = time.monotonic()
+                    wait = bucket.blocked_until - now
+                    if wait <= 0:
+                        self._refill(bucket, now)
+                        if bucket.tokens >= 1:
+                            bucket.tokens -= 1
+                            break
+                        wait = (1 - bucket.tokens) / bucket.refill_rate
+                    await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+        self.requests += 1
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.waited += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def observe(self, subscription: str, status_code: int, headers) -> None:
+        """Update the subscription or resource graph bucket from an ARM response."""
+        bucket = self._bucket(subscription)
+        now = time.monotonic()
+        for header in (GRAPH_REMAINING_HEADER,) if subscription == GRAPH_BUCKET else REMAINING_READS_HEADERS:
+            value = headers.get(header)
+            if value is not None and value.isdigit():
+                bucket.remaining = int(value)
+                self._refill(bucket, now)
+                bucket.tokens = min(bucket.tokens, max(bucket.remaining - bucket.low_quota, 0))
+                if subscription == GRAPH_BUCKET and bucket.remaining <= bucket.low_quota:
+                    resetsAfter = _resets_after(headers.get(GRAPH_RESETS_AFTER_HEADER))
+                    if resetsAfter is not None:
+                        bucket.blocked_until = max(bucket.blocked_until, now + resetsAfter)
+                break
+        if status_code == 429:
+            bucket.throttled += 1
+            try:
+                retryAfter = float(headers.get("Retry-After", THROTTLE_DEFAULT_RETRY_AFTER))
+            except ValueError:
+                retryAfter = THROTTLE_DEFAULT_RETRY_AFTER
+            bucket.blocked_until = max(bucket.blocked_until, now + retryAfter)
+            bucket.tokens = 0
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "queueDepth": self.queued,
+            "requests": self.requests,
+            "waitedRequests": self.waited,
+            "averageWaitSeconds": self.wait_seconds / self.waited if self.waited else 0.0,
+            "maxWaitSeconds": self.max_wait_seconds,
+            "subscriptions": {
+                {"": "tenant", GRAPH_BUCKET: "resourceGraph"}.get(subscription, subscription): {
+                    "tokens": round(bucket.tokens, 2),
+                    "remainingReads": bucket.remaining,
+                    "throttled": bucket.throttled,
+                    "blockedForSeconds": max(bucket.blocked_until - now, 0.0),
+                }
+                for subscription, bucket in self._buckets.items()
+            },
+        }
+
+
+class ArmThrottlingPolicy(AsyncHTTPPolicy):
+    """Pipeline policy sending every request attempt through the shared ArmThrottle."""
+
+    def __init__(self, throttle: ArmThrottle):
+        super().__init__()
+        self._throttle = throttle
+
+    async def send(self, request: PipelineRequest) -> PipelineResponse:
+        url = request.http_request.url
+        if GRAPH_PATTERN.search(url):
+            subscription = GRAPH_BUCKET
+        else:
+            match = SUBSCRIPTION_PATTERN.search(url)
+            subscription = match.group(1).lower() if match else ""
+        await self._throttle.acquire(subscription)
+        response = await self.next.send(request)
+        self._throttle.observe(subscription, response.http_response.status_code, response.http_response.headers)
+        return response
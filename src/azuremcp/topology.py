@@ -0,0 +1,215 @@
+from server import server
+
+import asyncio
+from pydantic import Field
+from mcp.server.fastmcp import Context
+from azure.mgmt.core.tools import parse_resource_id, resource_id
+from batch import fetch_profile
+from cache import BypassCache
+from resource import LIST_MAX_ITEMS, list_azure_resources_in_resource_group
+
+# Constants
+AKS_OUTBOUND_LOAD_BALANCER_NAME = "kubernetes"
+VIRTUAL_NETWORK_TYPE = "Microsoft.Network/virtualNetworks"
+NAT_GATEWAY_TYPE = "Microsoft.Network/natGateways"
+
+
+def _id(reference: dict | None) -> str | None:
+    return reference.get("id") if isinstance(reference, dict) else None
+
+
+class DependencyGraph:
+    """
+    Fetch each resource of a dependency graph once, however many branches reference it.
+    """
+
+    def __init__(self, ctx: Context, bypassCache: bool):
+        self._ctx = ctx
+        self._bypassCache = bypassCache
+        self._fetches: dict[str, asyncio.Task] = {}
+        self.ids: dict[str, str] = {}
+        self.edges: list[dict] = []
+        self.errors: list[dict] = []
+
+    def link(self, source: str, target: str | None, relation: str) -> str | None:
+        if target:
+            self.edges.append({"from": source, "to": target, "relation": relation})
+        return target
+
+    async def get(self, resourceId: str) -> dict | None:
+        key = resourceId.lower()
+        if key not in self._fetches:
+            self.ids[key] = resourceId
+            self._fetches[key] = asyncio.create_task(fetch_profile(self._ctx, resourceId, self._bypassCache))
+        try:
+            return await asyncio.shield(self._fetches[key])
+        except Exception:
+            return None
+
+    async def list(self, subscriptionId: str, resourceGroupName: str, resourceType: str) -> list[str]:
+        """Ids of the resources of a type in a resource group, recording instead of raising failures."""
+        try:
+            result = await list_azure_resources_in_resource_group(
+                self._ctx,
+                subscriptionId=subscriptionId,
+                resourceGroupName=resourceGroupName,
+                resourceType=resourceType,
+                tagName=None,
+                tagValue=None,
+                filter=None,
+                expand=None,
+                top=None,
+                maxItems=LIST_MAX_ITEMS,
+                continuationToken=None,
+                streamRows=False,
+            )
+        except Exception as e:
+            self.errors.append({"resourceGroup": resourceGroupName, "resourceType": resourceType, "error": f"{type(e).__name__}: {e}"})
+            return []
+        return [item["id"] for item in result["value"]]
+
+    async def resources(self) -> dict:
+        await asyncio.gather(*self._fetches.values(), return_exceptions=True)
+        resources = {}
+        for key, task in self._fetches.items():
+            error = task.exception()
+            resources[self.ids[key]] = {"error": f"{type(error).__name__}: {error}"} if error else task.result()
+        return resources
+
+
+async def _walk_virtual_network(graph: DependencyGraph, vnetId: str, subnetIds: set[str] | None = None) -> None:
+    """Fetch the network security group, route table and nat gateway of the given subnets, or of every subnet."""
+    vnet = await graph.get(vnetId)
+    if vnet is None:
+        return
+    targets = []
+    for subnet in vnet.get("properties", {}).get("subnets", []):
+        subnetId = subnet.get("id", "")
+        if subnetIds is None:
+            graph.link(vnetId, subnetId, "subnet")
+        elif subnetId.lower() not in subnetIds:
+            continue
+        properties = subnet.get("properties", {})
+        targets += [
+            graph.link(subnetId, _id(properties.get("networkSecurityGroup")), "networkSecurityGroup"),
+            graph.link(subnetId, _id(properties.get("routeTable")), "routeTable"),
+            graph.link(subnetId, _id(properties.get("natGateway")), "natGateway"),
+        ]
+    await asyncio.gather(*[_walk_nat_gateway(graph, target) if "/natgateways/" in target.lower() else graph.get(target) for target in targets if target])
+
+
+async def _walk_subnets(graph: DependencyGraph, clusterId: str, vnetId: str, subnetIds: list[str]) -> None:
+    for subnetId in subnetIds:
+        graph.link(clusterId, subnetId, "agentPoolSubnet")
+        graph.link(subnetId, vnetId, "virtualNetwork")
+    await _walk_virtual_network(graph, vnetId, {subnetId.lower() for subnetId in subnetIds})
+
+
+async def _walk_managed_virtual_network(graph: DependencyGraph, clusterId: str, subscriptionId: str, nodeResourceGroup: str) -> None:
+    """Without a custom subnet the agent pools join the virtual network AKS creates in the node resource group."""
+    vnetIds = await graph.list(subscriptionId, nodeResourceGroup, VIRTUAL_NETWORK_TYPE)
+    await asyncio.gather(*[_walk_virtual_network(graph, graph.link(clusterId, vnetId, "virtualNetwork")) for vnetId in vnetIds])
+
+
+async def _walk_nat_gateway(graph: DependencyGraph, natGatewayId: str) -> None:
+    natGateway = await graph.get(natGatewayId)
+    if natGateway is None:
+        return
+    await asyncio.gather(*[
+        graph.get(graph.link(natGatewayId, _id(ip), "publicIP"))
+        for ip in natGateway.get("properties", {}).get("publicIpAddresses") or []
+        if _id(ip)
+    ])
+
+
+async def _walk_managed_nat_gateway(graph: DependencyGraph, clusterId: str, subscriptionId: str, nodeResourceGroup: str) -> None:
+    natGatewayIds = await graph.list(subscriptionId, nodeResourceGroup, NAT_GATEWAY_TYPE)
+    await asyncio.gather(*[_walk_nat_gateway(graph, graph.link(clusterId, natGatewayId, "outboundNatGateway")) for natGatewayId in natGatewayIds])
+
+
+async def _walk_load_balancer(graph: DependencyGraph, clusterId: str, loadBalancerId: str) -> None:
+    graph.link(clusterId, loadBalancerId, "outboundLoadBalancer")
+    loadBalancer = await graph.get(loadBalancerId)
+    if loadBalancer is None:
+        return
+    await asyncio.gather(*[
+        graph.get(graph.link(loadBalancerId, _id(frontend.get("properties", {}).get("publicIPAddress")), "frontendPublicIP"))
+        for frontend in loadBalancer.get("properties", {}).get("frontendIPConfigurations", [])
+        if _id(frontend.get("properties", {}).get("publicIPAddress"))
+    ])
+
+
+async def _walk_outbound_ips(graph: DependencyGraph, clusterId: str, profile: dict) -> None:
+    await asyncio.gather(*[
+        graph.get(graph.link(clusterId, _id(ip), "outboundIP"))
+        for ip in profile.get("effectiveOutboundIPs") or []
+        if _id(ip)
+    ])
+
+
+@server.tool(
+    name="Get-Azure-ManagedCluster-DependencyGraph",
+    description="Get an Azure Kubernetes Service (AKS) managed cluster together with all of its network dependencies in one JSON document. "
+    "The cluster resource id is required and is in the format of /subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/Microsoft.ContainerService/managedClusters/{clusterName}. "
+    "Agent pool subnets lead to the virtual network, route table, network security group and nat gateway, and the network profile leads to the outbound load balancer, nat gateway and outbound ips. "
+    "Clusters without a custom subnet use the virtual network and managed nat gateway found in the node resource group. "
+    "Independent branches are fetched in parallel and resources shared by several branches are fetched once. "
+    "It returns the cluster profile, every dependent resource profile keyed by resource id (or the error of that resource) and the edges between them.",
+)
+async def get_azure_kubernetes_dependency_graph(
+    ctx: Context,
+    clusterId: str = Field(description="The Azure kubernetes cluster resource id."),
+    bypassCache: BypassCache = False,
+) -> dict:
+    """
+    Azure Kubernetes Service (AKS) managed cluster dependency graph.
+    Args:
+            clusterId (str): The Azure kubernetes cluster resource id.
+            bypassCache (bool): Skip the response cache.
+    Returns:
+            dict: The cluster, its dependent resources, the edges between them and the listings that failed in JSON format.
+    """
+    graph = DependencyGraph(ctx, bypassCache)
+    cluster = await fetch_profile(ctx, clusterId, bypassCache)
+    properties = cluster.get("properties", {})
+    networkProfile = properties.get("networkProfile") or {}
+    branches = []
+
+    agentPools = properties.get("agentPoolProfiles") or []
+    subnetIds = {pool["vnetSubnetID"] for pool in agentPools if pool.get("vnetSubnetID")}
+    subnetsByVnet: dict[str, list[str]] = {}
+    for subnetId in sorted(subnetIds):
+        subnetsByVnet.setdefault(subnetId.rsplit("/subnets/", 1)[0], []).append(subnetId)
+    for vnetId, vnetSubnetIds in subnetsByVnet.items():
+        branches.append(_walk_subnets(graph, clusterId, vnetId, vnetSubnetIds))
+
+    nodeResourceGroup = properties.get("nodeResourceGroup")
+    outboundType = networkProfile.get("outboundType", "loadBalancer")
+    if nodeResourceGroup:
+        subscriptionId = parse_resource_id(clusterId)["subscription"]
+        nodeResourceGroupId = resource_id(subscription=subscriptionId, resource_group=nodeResourceGroup)
+        branches.append(graph.get(graph.link(clusterId, nodeResourceGroupId, "nodeResourceGroup")))
+        if any(not pool.get("vnetSubnetID") for pool in agentPools):
+            branches.append(_walk_managed_virtual_network(graph, clusterId, subscriptionId, nodeResourceGroup))
+        if outboundType == "managedNATGateway":
+            branches.append(_walk_managed_nat_gateway(graph, clusterId, subscriptionId, nodeResourceGroup))
+        if outboundType == "loadBalancer":
+            branches.append(_walk_load_balancer(graph, clusterId, resource_id(
+                subscription=subscriptionId,
+                resource_group=nodeResourceGroup,
+                namespace="Microsoft.Network",
+                type="loadBalancers",
+                name=AKS_OUTBOUND_LOAD_BALANCER_NAME,
+            )))
+
+    for outboundProfile in ("loadBalancerProfile", "natGatewayProfile"):
+        if networkProfile.get(outboundProfile):
+            branches.append(_walk_outbound_ips(graph, clusterId, networkProfile[outboundProfile]))
+
+    await asyncio.gather(*branches)
+    return {
+        "cluster": cluster,
+        "resources": await graph.resources(),
+        "edges": graph.edges,
+        "errors": graph.errors,
+    }
@@ -0,0 +1,12 @@
+"""
+Unit tests of the pure parts of the server. They use only the standard library
+and run from the repository root with either of:
+
+    python -m unittest discover -s tests -t .
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+# The server modules import each other by their flat names, as when run from src/azuremcp.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "azuremcp"))
@@ -0,0 +1,88 @@
+import copy
+import unittest
+
+from projection import project, prune, select
+
+PROFILE = {
+    "id": "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.ContainerService/managedClusters/aks",
+    "name": "aks",
+    "tags": None,
+    "properties": {
+        "provisioningState": "Succeeded",
+        "networkProfile": {"outboundType": "loadBalancer", "podCidrs": []},
+        "agentPoolProfiles": [
+            {"name": "system", "count": 3, "vnetSubnetId": "/subnets/system"},
+            {"name": "user", "count": 2},
+        ],
+    },
+}
+
+
+class SelectTest(unittest.TestCase):
+    def test_dotted_paths(self):
+        self.assertEqual(
+            select(PROFILE, ["name", "properties.networkProfile.outboundType"]),
+            {"name": "aks", "properties": {"networkProfile": {"outboundType": "loadBalancer"}}},
+        )
+
+    def test_paths_sharing_a_parent_are_merged(self):
+        self.assertEqual(
+            select(PROFILE, ["properties.provisioningState", "properties.networkProfile.outboundType"]),
+            {"properties": {"provisioningState": "Succeeded", "networkProfile": {"outboundType": "loadBalancer"}}},
+        )
+
+    def test_paths_crossing_a_list_keep_one_item_per_item(self):
+        self.assertEqual(
+            select(PROFILE, ["properties.agentPoolProfiles.name", "properties.agentPoolProfiles.vnetSubnetId"]),
+            {"properties": {"agentPoolProfiles": [{"name": "system", "vnetSubnetId": "/subnets/system"}, {"name": "user"}]}},
+        )
+
+    def test_missing_item_fields_keep_list_positions(self):
+        self.assertEqual(
+            select(PROFILE, ["properties.agentPoolProfiles.vnetSubnetId"]),
+            {"properties": {"agentPoolProfiles": [{"vnetSubnetId": "/subnets/system"}, {}]}},
+        )
+
+    def test_missing_paths_are_dropped(self):
+        self.assertEqual(select(PROFILE, ["properties.missing", "missing.path", ""]), {})
+
+    def test_null_values_are_kept(self):
+        self.assertEqual(select(PROFILE, ["tags"]), {"tags": None})
+
+    def test_profile_is_not_modified(self):
+        before = copy.deepcopy(PROFILE)
+        result = select(PROFILE, ["properties.networkProfile", "properties.networkProfile.outboundType"])
+        result["properties"]["networkProfile"]["outboundType"] = "userDefinedRouting"
+        self.assertEqual(PROFILE, before)
+
+
+class PruneTest(unittest.TestCase):
+    def test_drops_null_and_empty_fields(self):
+        self.assertEqual(
+            prune({"a": None, "b": "", "c": [], "d": {}, "e": 0, "f": False, "g": "x"}),
+            {"e": 0, "f": False, "g": "x"},
+        )
+
+    def test_drops_containers_left_empty(self):
+        self.assertEqual(prune({"a": {"b": {"c": None}}, "d": [{"e": []}, None, 1]}), {"d": [1]})
+
+    def test_profile(self):
+        pruned = prune(PROFILE)
+        self.assertNotIn("tags", pruned)
+        self.assertEqual(pruned["properties"]["networkProfile"], {"outboundType": "loadBalancer"})
+
+
+class ProjectTest(unittest.TestCase):
+    def test_without_options_returns_profile(self):
+        self.assertIs(project(PROFILE), PROFILE)
+
+    def test_fields_then_jmespath_then_summary(self):
+        self.assertEqual(
+            project(PROFILE, fields=["properties.agentPoolProfiles"], jmesPath="properties.agentPoolProfiles[?count > `2`].name"),
+            ["system"],
+        )
+        self.assertEqual(project(PROFILE, jmesPath="properties.networkProfile", summary=True), {"outboundType": "loadBalancer"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import ipaddress
+import unittest
+
+from reachability import ANY_PORT, CompiledRouteTable, CompiledRule, PrefixTrie, RuleTable, TagContext
+
+ASG_ID = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/applicationSecurityGroups/web"
+
+
+def address(value: str):
+    return ipaddress.ip_address(value)
+
+
+def rule(name: str, priority: int, access: str = "Allow", protocol: str = "Tcp", ports: list[str] | None = None, source: str = "*", destination: str = "*", **properties) -> dict:
+    return {
+        "name": name,
+        "properties": {
+            "priority": priority,
+            "access": access,
+            "protocol": protocol,
+            "sourceAddressPrefix": source,
+            "destinationAddressPrefix": destination,
+            "sourcePortRange": "*",
+            "destinationPortRanges": ports or ["*"],
+            **properties,
+        },
+    }
+
+
+def table(tags: TagContext, *rules: dict) -> RuleTable:
+    return RuleTable([CompiledRule.compile(r, tags) for r in rules])
+
+
+class PrefixTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.trie = PrefixTrie()
+        for prefix in ["0.0.0.0/0", "10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "::/0", "fd00::/8"]:
+            self.trie.insert(ipaddress.ip_network(prefix), prefix)
+
+    def test_longest_prefix_wins(self):
+        self.assertEqual(self.trie.lookup(address("10.1.2.3")), "10.1.2.0/24")
+        self.assertEqual(self.trie.lookup(address("10.1.3.1")), "10.1.0.0/16")
+        self.assertEqual(self.trie.lookup(address("10.2.0.1")), "10.0.0.0/8")
+        self.assertEqual(self.trie.lookup(address("8.8.8.8")), "0.0.0.0/0")
+
+    def test_prefix_edges(self):
+        self.assertEqual(self.trie.lookup(address("10.1.2.0")), "10.1.2.0/24")
+        self.assertEqual(self.trie.lookup(address("10.1.2.255")), "10.1.2.0/24")
+        self.assertEqual(self.trie.lookup(address("10.1.1.255")), "10.1.0.0/16")
+        self.assertEqual(self.trie.lookup(address("11.0.0.0")), "0.0.0.0/0")
+
+    def test_host_route(self):
+        self.trie.insert(ipaddress.ip_network("10.1.2.3/32"), "host")
+        self.assertEqual(self.trie.lookup(address("10.1.2.3")), "host")
+        self.assertEqual(self.trie.lookup(address("10.1.2.4")), "10.1.2.0/24")
+
+    def test_address_families_are_separate(self):
+        self.assertEqual(self.trie.lookup(address("fd00::1")), "fd00::/8")
+        self.assertEqual(self.trie.lookup(address("2001:db8::1")), "::/0")
+
+    def test_no_match(self):
+        self.assertIsNone(PrefixTrie().lookup(address("10.0.0.1")))
+
+
+class RouteTableTest(unittest.TestCase):
+    def test_virtual_network_overrides_none_route(self):
+        routes = CompiledRouteTable(None, TagContext.build([], {}, {}), ["10.1.0.0/16"])
+        self.assertEqual(routes.lookup(address("10.1.0.4"))["nextHopType"], "VnetLocal")
+        self.assertEqual(routes.lookup(address("10.2.0.4"))["nextHopType"], "None")
+        self.assertEqual(routes.lookup(address("8.8.8.8"))["nextHopType"], "Internet")
+
+    def test_user_route_overrides_system_route(self):
+        profile = {"properties": {"routes": [
+            {"name": "firewall", "properties": {"addressPrefix": "0.0.0.0/0", "nextHopType": "VirtualAppliance", "nextHopIpAddress": "10.0.1.4"}},
+            {"name": "storage", "properties": {"addressPrefix": "Storage", "nextHopType": "Internet"}},
+            {"name": "unknown", "properties": {"addressPrefix": "Sql", "nextHopType": "Internet"}},
+        ]}}
+        tags = TagContext.build([], {"Storage": ["20.60.0.0/16"]}, {})
+        routes = CompiledRouteTable(profile, tags, ["10.0.0.0/16"])
+        self.assertEqual(routes.lookup(address("8.8.8.8"))["route"], "firewall")
+        self.assertEqual(routes.lookup(address("20.60.1.1"))["route"], "storage")
+        self.assertEqual(routes.lookup(address("10.0.0.4"))["nextHopType"], "VnetLocal")
+        self.assertEqual(routes.unresolved, ["unknown"])
+
+
+class RuleTableTest(unittest.TestCase):
+    def setUp(self):
+        self.tags = TagContext.build(["10.0.0.0/16"], {}, {})
+        self.table = table(
+            self.tags,
+            rule("http", 100, ports=["80"]),
+            rule("smb", 200, access="Deny", ports=["445-446"]),
+            rule("high", 300, ports=["1024-65535"]),
+            rule("deny-all", 4096, access="Deny", protocol="*"),
+        )
+
+    def names(self, port):
+        return [r.name for r in self.table.candidates(port)]
+
+    def test_candidates_at_interval_boundaries(self):
+        self.assertEqual(self.names(79), ["deny-all"])
+        self.assertEqual(self.names(80), ["http", "deny-all"])
+        self.assertEqual(self.names(81), ["deny-all"])
+        self.assertEqual(self.names(444), ["deny-all"])
+        self.assertEqual(self.names(445), ["smb", "deny-all"])
+        self.assertEqual(self.names(446), ["smb", "deny-all"])
+        self.assertEqual(self.names(447), ["deny-all"])
+        self.assertEqual(self.names(1023), ["deny-all"])
+        self.assertEqual(self.names(1024), ["high", "deny-all"])
+        self.assertEqual(self.names(65535), ["high", "deny-all"])
+        self.assertEqual(self.names(0), ["deny-all"])
+
+    def test_candidates_without_port_are_all_rules(self):
+        self.assertEqual(self.names(None), ["http", "smb", "high", "deny-all"])
+
+    def evaluate(self, port, protocol="tcp", sourcePort=None, source="10.0.0.4", destination="10.0.1.4"):
+        return self.table.evaluate(protocol, address(source), sourcePort, address(destination), port)
+
+    def test_evaluate_at_interval_boundaries(self):
+        self.assertEqual(self.evaluate(79)["rule"], "deny-all")
+        self.assertEqual(self.evaluate(80)["rule"], "http")
+        self.assertEqual(self.evaluate(445)["access"], "Deny")
+        self.assertEqual(self.evaluate(446)["rule"], "smb")
+        self.assertEqual(self.evaluate(447)["rule"], "deny-all")
+        self.assertEqual(self.evaluate(1024)["rule"], "high")
+        for port in (79, 80, 445, 1024):
+            self.assertFalse(self.evaluate(port)["indeterminate"])
+
+    def test_protocol_mismatch_skips_rule(self):
+        self.assertEqual(self.evaluate(80, protocol="udp")["rule"], "deny-all")
+
+    def test_tcp_without_port_is_indeterminate(self):
+        verdict = self.evaluate(None)
+        self.assertEqual(verdict["rule"], "deny-all")
+        self.assertTrue(verdict["indeterminate"])
+        self.assertEqual([r["rule"] for r in verdict["unresolvedRules"]], ["http", "smb", "high"])
+        self.assertEqual(verdict["unresolvedRules"][0]["unresolved"], ["destinationPort"])
+
+    def test_protocol_without_ports(self):
+        verdict = self.evaluate(None, protocol="icmp")
+        self.assertEqual(verdict["rule"], "deny-all")
+        self.assertFalse(verdict["indeterminate"])
+
+    def test_source_port(self):
+        restricted = table(self.tags, rule("ephemeral", 100, sourcePortRange="32768-60999"), rule("deny-all", 4096, access="Deny"))
+        self.assertEqual(restricted.evaluate("tcp", address("10.0.0.4"), 40000, address("10.0.1.4"), 80)["rule"], "ephemeral")
+        self.assertEqual(restricted.evaluate("tcp", address("10.0.0.4"), 1000, address("10.0.1.4"), 80)["rule"], "deny-all")
+        verdict = restricted.evaluate("tcp", address("10.0.0.4"), None, address("10.0.1.4"), 80)
+        self.assertTrue(verdict["indeterminate"])
+        self.assertEqual(verdict["unresolvedRules"][0]["unresolved"], ["sourcePort"])
+
+    def test_no_rule_matches(self):
+        verdict = table(self.tags, rule("http", 100, ports=["80"])).evaluate("tcp", address("10.0.0.4"), None, address("10.0.1.4"), 81)
+        self.assertEqual((verdict["access"], verdict["rule"]), ("Deny", None))
+
+    def test_port_ranges(self):
+        compiled = CompiledRule.compile(rule("any", 100), self.tags)
+        self.assertEqual(compiled.destinationPorts, ANY_PORT)
+        compiled = CompiledRule.compile(rule("some", 100, ports=["22", "8000-8080"]), self.tags)
+        self.assertEqual(compiled.destinationPorts, [(22, 22), (8000, 8080)])
+
+
+class TagResolutionTest(unittest.TestCase):
+    def setUp(self):
+        self.tags = TagContext.build(["10.0.0.0/16"], {"Storage": ["20.60.0.0/16"]}, {ASG_ID.upper(): ["10.0.2.4"]})
+
+    def evaluate(self, rules, source="10.0.0.4", destination="10.0.1.4", port=443):
+        return table(self.tags, *rules, rule("deny-all", 4096, access="Deny")).evaluate("tcp", address(source), None, address(destination), port)
+
+    def test_virtual_network_tag(self):
+        rules = [rule("vnet", 100, destination="VirtualNetwork")]
+        self.assertEqual(self.evaluate(rules)["rule"], "vnet")
+        self.assertEqual(self.evaluate(rules, destination="10.1.0.4")["rule"], "deny-all")
+
+    def test_internet_tag_excludes_virtual_network(self):
+        rules = [rule("internet", 100, destination="Internet")]
+        self.assertEqual(self.evaluate(rules, destination="8.8.8.8")["rule"], "internet")
+        self.assertEqual(self.evaluate(rules, destination="10.0.1.4")["rule"], "deny-all")
+
+    def test_service_tag_is_case_insensitive(self):
+        rules = [rule("storage", 100, destination="storage")]
+        self.assertEqual(self.evaluate(rules, destination="20.60.1.1")["rule"], "storage")
+        self.assertEqual(self.evaluate(rules, destination="20.61.1.1")["rule"], "deny-all")
+
+    def test_azure_load_balancer_is_built_in(self):
+        rules = [rule("probe", 100, source="AzureLoadBalancer")]
+        self.assertEqual(self.evaluate(rules, source="168.63.129.16")["rule"], "probe")
+
+    def test_application_security_group(self):
+        rules = [rule("web", 100, destination=None, destinationApplicationSecurityGroups=[{"id": ASG_ID}])]
+        self.assertEqual(self.evaluate(rules, destination="10.0.2.4")["rule"], "web")
+        self.assertEqual(self.evaluate(rules, destination="10.0.2.5")["rule"], "deny-all")
+
+    def test_unresolved_tags_make_verdict_indeterminate(self):
+        rules = [
+            rule("sql", 100, destination="Sql"),
+            rule("asg", 200, destination=None, destinationApplicationSecurityGroups=[{"id": ASG_ID + "-other"}]),
+        ]
+        verdict = self.evaluate(rules)
+        self.assertEqual(verdict["rule"], "deny-all")
+        self.assertTrue(verdict["indeterminate"])
+        self.assertEqual([r["unresolved"] for r in verdict["unresolvedRules"]], [["Sql"], [ASG_ID + "-other"]])
+
+    def test_decidable_mismatch_is_not_unresolved(self):
+        rules = [rule("sql", 100, source="10.9.0.0/16", destination="Sql")]
+        verdict = self.evaluate(rules)
+        self.assertEqual(verdict["rule"], "deny-all")
+        self.assertFalse(verdict["indeterminate"])
+
+
+if __name__ == "__main__":
+    unittest.main()
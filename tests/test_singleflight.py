@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+
+from singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_one_call(self):
+        flights, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*[flights.do("key", fetch) for _ in range(3)])
+        self.assertEqual(results, ["result"] * 3)
+        self.assertEqual((len(calls), flights.calls, flights.coalesced, flights.in_flight), (1, 1, 2, 0))
+
+    async def test_progress_reaches_every_listening_caller(self):
+        flights, started, reports = SingleFlight(), asyncio.Event(), {"first": [], "second": []}
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.01)
+            await flights.progress("key")(1, 2)
+            return "result"
+
+        async def caller(name):
+            async def listener(progress, total):
+                reports[name].append((progress, total))
+
+            async with flights.listen("key", listener):
+                return await flights.do("key", fetch)
+
+        first = asyncio.create_task(caller("first"))
+        await started.wait()
+        await caller("second")
+        await first
+        self.assertEqual(reports, {"first": [(1, 2)], "second": [(1, 2)]})
+
+    async def test_progress_without_listeners_is_dropped(self):
+        flights = SingleFlight()
+
+        async def listener(progress, total):
+            raise AssertionError("the caller already returned")
+
+        async with flights.listen("key", listener):
+            pass
+        await flights.progress("key")(1, 2)
+        self.assertEqual(flights._listeners, {})
+
+    async def test_failing_listener_does_not_fail_the_call(self):
+        flights, reports = SingleFlight(), []
+
+        async def gone(progress, total):
+            raise ConnectionError("session closed")
+
+        async def listener(progress, total):
+            reports.append(progress)
+
+        async def fetch():
+            await flights.progress("key")(1)
+            return "result"
+
+        async with flights.listen("key", gone), flights.listen("key", listener):
+            self.assertEqual(await flights.do("key", fetch), "result")
+        self.assertEqual(reports, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
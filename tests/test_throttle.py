@@ -0,0 +1,100 @@
+import time
+import unittest
+from unittest import mock
+
+from throttle import GRAPH_BUCKET, GRAPH_BUCKET_CAPACITY, THROTTLE_DEFAULT_RETRY_AFTER, ArmThrottle, _resets_after
+
+SUBSCRIPTION = "00000000-0000-0000-0000-000000000000"
+
+
+class ResetsAfterTest(unittest.TestCase):
+    def test_parses_time_span(self):
+        self.assertEqual(_resets_after("00:00:03"), 3.0)
+        self.assertEqual(_resets_after("01:02:03.5"), 3723.5)
+
+    def test_invalid_values(self):
+        for value in (None, "", "3", "00:03", "aa:bb:cc"):
+            self.assertIsNone(_resets_after(value))
+
+
+class ObserveTest(unittest.TestCase):
+    def setUp(self):
+        # A frozen clock keeps the buckets from refilling between observations.
+        self.now = time.monotonic()
+        patcher = mock.patch("throttle.time.monotonic", return_value=self.now)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.throttle = ArmThrottle(capacity=250.0, refill_rate=25.0, low_quota=25)
+
+    def bucket(self, subscription):
+        return self.throttle._bucket(subscription)
+
+    def test_remaining_reads_drain_bucket(self):
+        self.throttle.observe(SUBSCRIPTION, 200, {"x-ms-ratelimit-remaining-subscription-reads": "100"})
+        self.assertEqual(self.bucket(SUBSCRIPTION).remaining, 100)
+        self.assertEqual(self.bucket(SUBSCRIPTION).tokens, 75)
+
+    def test_global_reads_header(self):
+        self.throttle.observe(SUBSCRIPTION, 200, {"x-ms-ratelimit-remaining-subscription-global-reads": "10"})
+        self.assertEqual(self.bucket(SUBSCRIPTION).remaining, 10)
+        self.assertEqual(self.bucket(SUBSCRIPTION).tokens, 0)
+
+    def test_remaining_reads_never_refill_bucket(self):
+        bucket = self.bucket(SUBSCRIPTION)
+        bucket.tokens, bucket.updated = 5, self.now
+        self.throttle.observe(SUBSCRIPTION, 200, {"x-ms-ratelimit-remaining-subscription-reads": "11999"})
+        self.assertEqual(self.bucket(SUBSCRIPTION).tokens, 5)
+
+    def test_invalid_header_is_ignored(self):
+        self.throttle.observe(SUBSCRIPTION, 200, {"x-ms-ratelimit-remaining-subscription-reads": "n/a"})
+        self.assertIsNone(self.bucket(SUBSCRIPTION).remaining)
+        self.assertEqual(self.bucket(SUBSCRIPTION).tokens, 250)
+
+    def test_429_blocks_subscription(self):
+        self.throttle.observe(SUBSCRIPTION, 429, {"Retry-After": "17"})
+        bucket = self.bucket(SUBSCRIPTION)
+        self.assertEqual((bucket.tokens, bucket.throttled, bucket.blocked_until), (0, 1, self.now + 17))
+        self.assertEqual(self.bucket("other").blocked_until, 0.0)
+
+    def test_429_without_valid_retry_after(self):
+        self.throttle.observe(SUBSCRIPTION, 429, {"Retry-After": "soon"})
+        self.assertEqual(self.bucket(SUBSCRIPTION).blocked_until, self.now + THROTTLE_DEFAULT_RETRY_AFTER)
+
+    def test_shorter_retry_after_keeps_longer_block(self):
+        self.throttle.observe(SUBSCRIPTION, 429, {"Retry-After": "30"})
+        self.throttle.observe(SUBSCRIPTION, 429, {"Retry-After": "5"})
+        self.assertEqual(self.bucket(SUBSCRIPTION).blocked_until, self.now + 30)
+
+    def test_graph_bucket_uses_graph_quota(self):
+        bucket = self.bucket(GRAPH_BUCKET)
+        self.assertEqual(bucket.tokens, GRAPH_BUCKET_CAPACITY)
+        self.throttle.observe(GRAPH_BUCKET, 200, {"x-ms-user-quota-remaining": "10", "x-ms-ratelimit-remaining-subscription-reads": "0"})
+        self.assertEqual((bucket.remaining, bucket.tokens, bucket.blocked_until), (10, 9, 0.0))
+
+    def test_graph_quota_used_up_blocks_until_reset(self):
+        self.throttle.observe(GRAPH_BUCKET, 200, {"x-ms-user-quota-remaining": "1", "x-ms-user-quota-resets-after": "00:00:04"})
+        bucket = self.bucket(GRAPH_BUCKET)
+        self.assertEqual((bucket.tokens, bucket.blocked_until), (0, self.now + 4))
+
+    def test_graph_quota_left_does_not_block(self):
+        self.throttle.observe(GRAPH_BUCKET, 200, {"x-ms-user-quota-remaining": "2", "x-ms-user-quota-resets-after": "00:00:04"})
+        self.assertEqual(self.bucket(GRAPH_BUCKET).blocked_until, 0.0)
+
+    def test_bucket_refills_before_draining(self):
+        bucket = self.bucket(SUBSCRIPTION)
+        bucket.tokens, bucket.updated = 0, self.now
+        self.clock.return_value = self.now + 2
+        self.throttle.observe(SUBSCRIPTION, 200, {"x-ms-ratelimit-remaining-subscription-reads": "200"})
+        self.assertEqual(bucket.tokens, 50)
+
+    def test_stats_labels(self):
+        self.throttle.observe("", 200, {})
+        self.throttle.observe(GRAPH_BUCKET, 429, {"Retry-After": "3"})
+        subscriptions = self.throttle.stats()["subscriptions"]
+        self.assertEqual(sorted(subscriptions), ["resourceGraph", "tenant"])
+        self.assertEqual(subscriptions["resourceGraph"]["throttled"], 1)
+        self.assertEqual(subscriptions["resourceGraph"]["blockedForSeconds"], 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()